@@ -28,7 +28,6 @@ from config.agent_config import (
 )
 
 from config.plugin_config import get_plugin_type, validate_plugin_config
-from app.agent import TemplateAgent
 from app.agent_executor import TemplateAgentExecutor
 
 # Load environment variables
@@ -135,9 +134,10 @@ def main():
         # Create agent card
         agent_card = create_agent_card(host, port)
         
-        # Create server components
+        # Create server components; routes below share the executor's agent
+        agent_executor = TemplateAgentExecutor()
         request_handler = DefaultRequestHandler(
-            agent_executor=TemplateAgentExecutor(),
+            agent_executor=agent_executor,
             task_store=InMemoryTaskStore(),
         )
         
@@ -165,8 +165,7 @@ def main():
         @app.get("/capabilities")
         async def agent_capabilities():
             """Get agent capabilities"""
-            agent = TemplateAgent()
-            return await agent.get_capabilities()
+            return await agent_executor.agent.get_capabilities()
         
         @app.get("/health")
         async def health():
@@ -177,8 +176,18 @@ def main():
         print(f"Access your agent at: http://{host}:{port}")
         print()
         
-        # Run server
-        uvicorn.run(app, host=host, port=port, log_level=args.log_level.lower())
+        # Run server on uvloop/httptools; a single worker because the task
+        # store and plugin sessions live in this process
+        uvicorn.run(
+            app,
+            host=host,
+            port=port,
+            loop="uvloop",
+            http="httptools",
+            lifespan="on",
+            workers=1,
+            log_level=args.log_level.lower()
+        )
         
     except MissingConfigError as e:
         logger.error(f'Configuration Error: {e}')
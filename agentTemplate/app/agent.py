@@ -5,7 +5,7 @@ Main agent implementation with pluggable tool support.
 
 import os
 from collections.abc import AsyncIterable
-from typing import Any, Literal, List, Dict, Optional, Union
+from typing import Any, Literal, List, Dict, Optional, Tuple, Union
 
 from langchain_core.messages import AIMessage, ToolMessage
 from langchain_google_genai import ChatGoogleGenerativeAI
@@ -23,11 +23,35 @@ from plugins.plugin_manager import plugin_manager
 # Memory for conversation state
 memory = MemorySaver()
 
+# Compiled agent graph shared by every TemplateAgent, keyed by model instance and tool set
+_graph_cache: Dict[Tuple[Any, ...], Any] = {}
+
 class ResponseFormat(BaseModel):
     """Response format for the agent"""
     status: Literal['input_required', 'completed', 'error'] = 'input_required'
     message: str
 
+def _get_compiled_graph(model: Any, tools: List[Any]) -> Any:
+    """Compile the react agent graph once per model instance and tool set"""
+    # Key on the model object, not its class, so models differing only in name
+    # or temperature get their own graph; the cached graph keeps the model
+    # alive, so its id cannot be reused while the entry exists. Tool identity
+    # matters too: a schema change replaces tools under the same names
+    key = (id(model), tuple((tool.name, id(tool)) for tool in tools))
+    graph = _graph_cache.get(key)
+    if graph is None:
+        # Only the current tool set is worth keeping
+        _graph_cache.clear()
+        graph = create_react_agent(
+            model,
+            tools=tools,
+            checkpointer=memory,
+            prompt=AGENT_SYSTEM_INSTRUCTION,
+            response_format=ResponseFormat,
+        )
+        _graph_cache[key] = graph
+    return graph
+
 class TemplateAgent:
     """
     Template Agent - A pluggable agent built with A2A SDK and LangGraph
@@ -85,39 +109,21 @@ class TemplateAgent:
             if self.plugin:
                 self.tools = await self.plugin.load_tools()
                 
-                # Create or update agent graph
-                self.graph = create_react_agent(
-                    self.model,
-                    tools=self.tools,
-                    checkpointer=memory,
-                    prompt=AGENT_SYSTEM_INSTRUCTION,
-                    response_format=ResponseFormat,
-                )
+                # Reuse the compiled graph unless the tool set changed
+                self.graph = _get_compiled_graph(self.model, self.tools)
                 
                 return True
             else:
                 # No plugin available - create agent without tools
                 self.tools = []
-                self.graph = create_react_agent(
-                    self.model,
-                    tools=self.tools,
-                    checkpointer=memory,
-                    prompt=AGENT_SYSTEM_INSTRUCTION,
-                    response_format=ResponseFormat,
-                )
+                self.graph = _get_compiled_graph(self.model, self.tools)
                 return False
                 
         except Exception as e:
             print(f"Error initializing tools: {e}")
             # Create agent without tools as fallback
             self.tools = []
-            self.graph = create_react_agent(
-                self.model,
-                tools=self.tools,
-                checkpointer=memory,
-                prompt=AGENT_SYSTEM_INSTRUCTION,
-                response_format=ResponseFormat,
-            )
+            self.graph = _get_compiled_graph(self.model, self.tools)
             return False
     
     async def invoke(self, query: str, context_id: str) -> Dict[str, Any]:
@@ -166,7 +172,7 @@ class TemplateAgent:
         
         try:
             config = {'configurable': {'thread_id': context_id}}
-            self.graph.invoke({'messages': [('user', query)]}, config)
+            await self.graph.ainvoke({'messages': [('user', query)]}, config)
             return self.get_agent_response(config)
             
         except Exception as e:
@@ -206,7 +212,7 @@ class TemplateAgent:
             inputs = {'messages': [('user', query)]}
             config = {'configurable': {'thread_id': context_id}}
             
-            for item in self.graph.stream(inputs, config, stream_mode='values'):
+            async for item in self.graph.astream(inputs, config, stream_mode='values'):
                 message = item['messages'][-1]
                 
                 if isinstance(message, AIMessage) and message.tool_calls:
@@ -6,50 +6,56 @@ Define agent skills, capabilities, and properties here.
 import os
 from a2a.types import AgentSkill, AgentCapabilities
 
+# Skills and capabilities are trusted constants, so they are built once at
+# import time and skip pydantic validation
+AGENT_SKILLS = [
+    AgentSkill.model_construct(
+        id="template_skill",
+        name="Template Skill",
+        description="A template skill for demonstration purposes",
+        tags=["template", "example", "demo"],
+        examples=[
+            "This is a template example",
+            "Show me template functionality",
+            "Help me with template operations"
+        ]
+    ),
+    AgentSkill.model_construct(
+        id="tool_integration",
+        name="Tool Integration",
+        description="Integrate with various tools and APIs",
+        tags=["tools", "integration", "api", "mcp"],
+        examples=[
+            "Use the integrated tools",
+            "Call external API",
+            "Access MCP server functions"
+        ]
+    ),
+    AgentSkill.model_construct(
+        id="data_processing",
+        name="Data Processing",
+        description="Process and analyze data from various sources",
+        tags=["data", "processing", "analysis"],
+        examples=[
+            "Process this data",
+            "Analyze the information",
+            "Transform the input"
+        ]
+    )
+]
+
+AGENT_CAPABILITIES = AgentCapabilities(
+    streaming=True,
+    stateTransitionHistory=False
+)
+
 def get_agent_skills():
-    """Get agent skills - customize these for your specific agent"""
-    return [
-        AgentSkill(
-            id="template_skill",
-            name="Template Skill",
-            description="A template skill for demonstration purposes",
-            tags=["template", "example", "demo"],
-            examples=[
-                "This is a template example",
-                "Show me template functionality",
-                "Help me with template operations"
-            ]
-        ),
-        AgentSkill(
-            id="tool_integration",
-            name="Tool Integration",
-            description="Integrate with various tools and APIs",
-            tags=["tools", "integration", "api", "mcp"],
-            examples=[
-                "Use the integrated tools",
-                "Call external API",
-                "Access MCP server functions"
-            ]
-        ),
-        AgentSkill(
-            id="data_processing",
-            name="Data Processing",
-            description="Process and analyze data from various sources",
-            tags=["data", "processing", "analysis"],
-            examples=[
-                "Process this data",
-                "Analyze the information",
-                "Transform the input"
-            ]
-        )
-    ]
+    """Get agent skills - customize AGENT_SKILLS for your specific agent"""
+    return AGENT_SKILLS
 
 def get_agent_capabilities():
     """Get agent capabilities"""
-    return AgentCapabilities(
-        streaming=True,
-        stateTransitionHistory=False
-    )
+    return AGENT_CAPABILITIES
 
 def get_agent_name():
     """Get agent name from environment or default"""
@@ -4,7 +4,8 @@ Define plugin settings and configurations here.
 """
 
 import os
-from typing import Dict, Any
+from functools import lru_cache
+from typing import Dict, Any, Tuple
 
 def get_plugin_type():
     """Get the configured plugin type"""
@@ -16,13 +17,22 @@ def get_mcp_config():
         "command": os.getenv("MCP_COMMAND", "python example_mcp_server.py"),
         "timeout": int(os.getenv("MCP_TIMEOUT", "30")),
         "retry_count": int(os.getenv("MCP_RETRY_COUNT", "3")),
-        "env_vars": {
-            # Pass through any environment variables that MCP server might need
-            key: value for key, value in os.environ.items()
-            if key.startswith("MCP_") or key in ["GOOGLE_API_KEY", "OPENAI_API_KEY"]
-        }
+        # Defer spawning the MCP server until the first tool call
+        "lazy": os.getenv("MCP_LAZY_INIT", "true").lower() == "true",
+        # Seconds before the cached tool list is refreshed
+        "tools_ttl": int(os.getenv("MCP_TOOLS_TTL", "300")),
+        "env_vars": dict(_get_mcp_env_snapshot())
     }
 
+@lru_cache(maxsize=1)
+def _get_mcp_env_snapshot() -> Tuple[Tuple[str, str], ...]:
+    """Snapshot the environment passed through to the MCP server (scanned once)"""
+    # Resolved lazily so values loaded from .env by the entry point are included
+    return tuple(
+        (key, value) for key, value in os.environ.items()
+        if key.startswith("MCP_") or key in ("GOOGLE_API_KEY", "OPENAI_API_KEY")
+    )
+
 def get_api_config():
     """Get API plugin configuration"""
     return {
@@ -4,13 +4,56 @@ Integrates with external REST APIs.
 """
 
 import asyncio
+import functools
 import json
 from typing import List, Any, Dict, Optional
 import httpx
-from langchain_core.tools import tool
+from langchain_core.tools import StructuredTool
+from pydantic import BaseModel, Field
 
 from .base_plugin import BasePlugin, PluginInitializationError, PluginConnectionError
 
+# Keep connections to the API host alive between tool calls
+HTTP_POOL_LIMITS = httpx.Limits(
+    max_connections=100,
+    max_keepalive_connections=20,
+    keepalive_expiry=30.0
+)
+
+class EndpointArgs(BaseModel):
+    """Arguments shared by all API tools"""
+    endpoint: str = Field(..., description="API endpoint path")
+
+class QueryArgs(EndpointArgs):
+    """Arguments for requests with query parameters"""
+    params: Optional[Dict] = Field(None, description="Optional query parameters")
+
+class BodyArgs(EndpointArgs):
+    """Arguments for requests with a body"""
+    data: Optional[Dict] = Field(None, description="Optional request body data")
+
+class CustomRequestArgs(EndpointArgs):
+    """Arguments for a custom HTTP request"""
+    method: str = Field(..., description="HTTP method (GET, POST, PUT, DELETE, etc.)")
+    data: Optional[Dict] = Field(None, description="Optional request body data")
+    params: Optional[Dict] = Field(None, description="Optional query parameters")
+
+# (tool name, HTTP method, description, argument schema); a method of None
+# means the caller supplies it
+API_TOOL_SPECS = [
+    ("api_get", "GET", "Make a GET request to the API", QueryArgs),
+    ("api_post", "POST", "Make a POST request to the API", BodyArgs),
+    ("api_put", "PUT", "Make a PUT request to the API", BodyArgs),
+    ("api_delete", "DELETE", "Make a DELETE request to the API", EndpointArgs),
+    ("api_custom_request", None, "Make a custom HTTP request to the API", CustomRequestArgs),
+]
+
+async def _invoke_request(plugin: "APIPlugin", method: Optional[str], **kwargs: Any) -> str:
+    """Shared coroutine behind every API tool"""
+    if method is None:
+        method = kwargs.pop("method")
+    return await plugin._make_request(method, **kwargs)
+
 class APIPlugin(BasePlugin):
     """Plugin for integrating with external REST APIs"""
 
@@ -43,11 +86,12 @@ class APIPlugin(BasePlugin):
             self.timeout = self.get_config_value("timeout", 10)
             self.rate_limit = self.get_config_value("rate_limit", 100)
             
-            # Create HTTP client
+            # Create one pooled HTTP client reused by every tool call
             self.client = httpx.AsyncClient(
                 base_url=self.base_url,
                 headers=self.headers,
-                timeout=self.timeout,
+                timeout=httpx.Timeout(self.timeout, connect=10),
+                limits=HTTP_POOL_LIMITS,
                 verify=True
             )
             
@@ -69,14 +113,8 @@ class APIPlugin(BasePlugin):
         try:
             self.log_info("Loading API tools")
             
-            # Create API tools
-            tools = [
-                self._create_get_tool(),
-                self._create_post_tool(),
-                self._create_put_tool(),
-                self._create_delete_tool(),
-                self._create_custom_request_tool()
-            ]
+            # Tools are built once and reused until cleanup
+            tools = self.tools or self._build_tools()
             
             self.tools = tools
             self.log_info(f"Loaded {len(tools)} API tools")
@@ -87,96 +125,17 @@ class APIPlugin(BasePlugin):
             self.log_error(f"Failed to load API tools: {e}")
             raise PluginConnectionError(f"Failed to load API tools: {e}")
     
-    def _create_get_tool(self):
-        """Create GET request tool"""
-        @tool
-        def api_get(endpoint: str, params: Optional[Dict] = None) -> str:
-            """
-            Make a GET request to the API
-            
-            Args:
-                endpoint: API endpoint path
-                params: Optional query parameters
-            
-            Returns:
-                API response as string
-            """
-            return asyncio.run(self._make_request("GET", endpoint, params=params))
-        
-        return api_get
-
-    def _create_post_tool(self):
-        """Create POST request tool"""
-        @tool
-        def api_post(endpoint: str, data: Optional[Dict] = None) -> str:
-            """
-            Make a POST request to the API
-            
-            Args:
-                endpoint: API endpoint path
-                data: Optional request body data
-            
-            Returns:
-                API response as string
-            """
-            return asyncio.run(self._make_request("POST", endpoint, data=data))
-        
-        return api_post
-    
-    def _create_put_tool(self):
-        """Create PUT request tool"""
-        @tool
-        def api_put(endpoint: str, data: Optional[Dict] = None) -> str:
-            """
-            Make a PUT request to the API
-            
-            Args:
-                endpoint: API endpoint path
-                data: Optional request body data
-            
-            Returns:
-                API response as string
-            """
-            return asyncio.run(self._make_request("PUT", endpoint, data=data))
-        
-        return api_put
-
-    def _create_delete_tool(self):
-        """Create DELETE request tool"""
-        @tool
-        def api_delete(endpoint: str) -> str:
-            """
-            Make a DELETE request to the API
-            
-            Args:
-                endpoint: API endpoint path
-            
-            Returns:
-                API response as string
-            """
-            return asyncio.run(self._make_request("DELETE", endpoint))
-        
-        return api_delete
-    
-    def _create_custom_request_tool(self):
-        """Create custom request tool"""
-        @tool
-        def api_custom_request(method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> str:
-            """
-            Make a custom HTTP request to the API
-            
-            Args:
-                method: HTTP method (GET, POST, PUT, DELETE, etc.)
-                endpoint: API endpoint path
-                data: Optional request body data
-                params: Optional query parameters
-            
-            Returns:
-                API response as string
-            """
-            return asyncio.run(self._make_request(method, endpoint, data=data, params=params))
-        
-        return api_custom_request
+    def _build_tools(self) -> List[StructuredTool]:
+        """Build one tool per API operation, all bound to _invoke_request"""
+        return [
+            StructuredTool.from_function(
+                coroutine=functools.partial(_invoke_request, self, method),
+                name=name,
+                description=description,
+                args_schema=args_schema
+            )
+            for name, method, description, args_schema in API_TOOL_SPECS
+        ]
     
     async def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, params: Optional[Dict] = None) -> str:
         """Make HTTP request to API"""
@@ -4,6 +4,7 @@ All plugins must implement this interface.
 """
 
 from abc import ABC, abstractmethod
+from types import MappingProxyType
 from typing import List, Any, Dict, Optional
 import logging
 
@@ -40,6 +41,11 @@ class BasePlugin(ABC):
         self.tools = []
         self.is_initialized = False
         self.logger = logging.getLogger(f"{__name__}.{self.name}")
+        self._resolve_config()
+    
+    def _resolve_config(self) -> None:
+        """Snapshot the configuration so hot paths skip repeated lookups"""
+        self._cfg = MappingProxyType(dict(self.config) if isinstance(self.config, dict) else {})
     
     @abstractmethod
     async def initialize(self) -> None:
@@ -156,6 +162,7 @@ class BasePlugin(ABC):
             updates: Configuration updates
         """
         self.config.update(updates)
+        self._resolve_config()
         self.logger.info(f"Updated configuration: {updates}")
     
     def log_info(self, message: str) -> None:
@@ -170,6 +177,10 @@ class BasePlugin(ABC):
         """Log warning message"""
         self.logger.warning(f"[{self.name}] {message}")
     
+    def log_debug(self, message: str, *args: Any) -> None:
+        """Log debug message, formatting lazily"""
+        self.logger.debug(f"[{self.name}] {message}", *args)
+    
     def __str__(self) -> str:
         return f"{self.name}(initialized={self.is_initialized}, tools={len(self.tools)})"
     
@@ -4,19 +4,37 @@ Integrates with Model Context Protocol servers.
 """
 
 import asyncio
+import hashlib
+import logging
 import os
-from typing import List, Any, Dict
+import time
+from typing import List, Any, Dict, Optional
 from pathlib import Path
 
+import anyio
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
-from langchain_mcp_adapters.tools import load_mcp_tools
+from mcp.shared.exceptions import McpError
+from mcp.types import CONNECTION_CLOSED
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
 
 from .base_plugin import BasePlugin, PluginInitializationError, PluginConnectionError
 
+class _PluginSession:
+    """Session handed to the LangChain tools so their calls go through MCPPlugin.call_tool"""
+    
+    def __init__(self, plugin: "MCPPlugin"):
+        self._plugin = plugin
+    
+    async def call_tool(self, name: str, arguments: Optional[Dict[str, Any]] = None, **kwargs: Any) -> Any:
+        return await self._plugin.call_tool(name, arguments or {}, **kwargs)
+
 class MCPPlugin(BasePlugin):
     """Plugin for integrating with MCP servers"""
     
+    # Raised by the stdio streams once the MCP server process has gone away
+    SESSION_CLOSED_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream)
+    
     def __init__(self, config: Dict[str, Any]):
         super().__init__(config)
         self.session = None
@@ -24,73 +42,225 @@ class MCPPlugin(BasePlugin):
         self.command_parts = []
         self.server_params = None
         self._connection_active = False
+        self._deferred_init = False
+        # Task that enters and exits the MCP session, and the event that stops it
+        self._session_task: Optional[asyncio.Task] = None
+        self._session_stop: Optional[asyncio.Event] = None
+        self._session_lock = asyncio.Lock()
+        # Serializes requests on the stdio session shared by concurrent callers
+        self._call_lock = asyncio.Lock()
+        # Tool list cache, refreshed after the TTL and rebuilt on schema drift
+        self._schema_hash: Optional[str] = None
+        self._tools_fetched_at = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        # Tools hidden after a failure, with the monotonic time they failed;
+        # each one comes back once the tool TTL has passed
+        self.unavailable_tools: Dict[str, float] = {}
+        # Tool calls made by the agent share the lock and failure tracking
+        # of call_tool, and always use the current session
+        self._tool_session = _PluginSession(self)
+    
+    def _resolve_config(self) -> None:
+        """Precompute the command and timeout used on every call"""
+        super()._resolve_config()
+        command = self._cfg.get("command")
+        self._command = command if isinstance(command, str) else ""
+        self._command_parts = tuple(self._command.split())
+        self._timeout = self._cfg.get("timeout", 30)
+        self._tools_ttl = self._cfg.get("tools_ttl", 300)
     
     async def initialize(self) -> None:
         """Initialize MCP plugin"""
         try:
             self.log_info("Initializing MCP plugin")
             
-            # Parse MCP command
-            mcp_command = self.get_config_value("command")
-            if not mcp_command:
-                raise PluginInitializationError("MCP command not configured")
-            
-            self.command_parts = mcp_command.split()
-            if not self.command_parts:
-                raise PluginInitializationError("Invalid MCP command")
+            self._build_server_params()
             
-            # Create server parameters
-            self.server_params = StdioServerParameters(
-                command=self.command_parts[0],
-                args=self.command_parts[1:] if len(self.command_parts) > 1 else [],
-                env=self.get_config_value("env_vars", {})
-            )
-            
-            # Test connection
-            await self._test_mcp_connection()
+            if self._cfg.get("lazy", False):
+                # Defer the server spawn until the first tool call
+                self._deferred_init = True
+            else:
+                # Opening the persistent session doubles as the connection test
+                await self._ensure_session()
             
-            self.is_initialized = True
             self.log_info("MCP plugin initialized successfully")
             
         except Exception as e:
+            self.is_initialized = False
             self.log_error(f"Failed to initialize MCP plugin: {e}")
             raise PluginInitializationError(f"MCP plugin initialization failed: {e}")
     
+    def _build_server_params(self) -> None:
+        """Parse the MCP command into server parameters"""
+        # Parse MCP command
+        if not self._command:
+            raise PluginInitializationError("MCP command not configured")
+        
+        self.command_parts = list(self._command_parts)
+        if not self.command_parts:
+            raise PluginInitializationError("Invalid MCP command")
+        
+        # Create server parameters
+        self.server_params = StdioServerParameters(
+            command=self.command_parts[0],
+            args=self.command_parts[1:] if len(self.command_parts) > 1 else [],
+            env=self._cfg.get("env_vars", {})
+        )
+        
+        self.is_initialized = True
+    
+    async def _ensure_session(self) -> ClientSession:
+        """Open the persistent MCP session on first use"""
+        if self.session is not None:
+            return self.session
+        
+        async with self._session_lock:
+            # Another caller may have connected while we waited for the lock
+            if self.session is not None:
+                return self.session
+            
+            # Only build the parameters here: initialize() opens the session
+            # through this method and the lock is not reentrant
+            if not self.is_initialized or self.server_params is None:
+                try:
+                    self._build_server_params()
+                except PluginInitializationError as e:
+                    raise PluginConnectionError(f"Server parameters not initialized: {e}")
+            
+            timeout = self._timeout
+            ready = asyncio.get_running_loop().create_future()
+            stop = asyncio.Event()
+            self.log_info("Connecting to MCP server")
+            task = asyncio.create_task(self._run_session(self.server_params, ready, stop))
+            
+            try:
+                session = await ready
+            
+            except asyncio.TimeoutError:
+                error_msg = f"MCP server connection timeout after {timeout} seconds"
+                self.log_error(error_msg)
+                raise PluginConnectionError(error_msg)
+            
+            except Exception as e:
+                self.log_error(f"MCP server connection failed: {e}")
+                raise PluginConnectionError(f"MCP server connection failed: {e}")
+            
+            except BaseException:
+                task.cancel()
+                raise
+            
+            self._session_task = task
+            self._session_stop = stop
+            self.session = session
+            self._connection_active = True
+            self._deferred_init = False
+            self.log_info("MCP server connection successful")
+            
+            return session
+    
+    async def _run_session(self, server_params: StdioServerParameters, ready: asyncio.Future, stop: asyncio.Event) -> None:
+        """Own the MCP session for its whole life, so one task enters and exits it"""
+        try:
+            async with stdio_client(server_params) as (read_stream, write_stream):
+                async with ClientSession(read_stream, write_stream) as session:
+                    # Only the handshake counts against the timeout, not the spawn
+                    async with asyncio.timeout(self._timeout):
+                        await session.initialize()
+                    
+                    ready.set_result(session)
+                    await stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                self.log_warning(f"Error closing MCP session: {e}")
+        finally:
+            if not ready.done():
+                ready.cancel()
+    
+    async def _close_session(self, session: Optional[ClientSession] = None) -> None:
+        """Stop the session task; given a session, only while it is still the current one"""
+        async with self._session_lock:
+            if session is not None and self.session is not session:
+                return
+            task, stop = self._session_task, self._session_stop
+            self._session_task = None
+            self._session_stop = None
+            self.session = None
+            self._connection_active = False
+        
+        if task is not None:
+            # The owning task exits the session and stops the server process
+            stop.set()
+            await asyncio.wait([task])
+    
+    def _is_session_closed(self, error: BaseException) -> bool:
+        """Check whether an error means the MCP server connection is gone"""
+        if isinstance(error, McpError):
+            return error.error.code == CONNECTION_CLOSED
+        return isinstance(error, self.SESSION_CLOSED_ERRORS)
+    
     async def load_tools(self) -> List[Any]:
         """Load tools from MCP server"""
-        if not self.is_initialized:
-            await self.initialize()
+        if self.tools:
+            expired = time.monotonic() - self._tools_fetched_at > self._tools_ttl
+            if expired and (self._refresh_task is None or self._refresh_task.done()):
+                # Serve the cached tools while a refresh runs in the background
+                self._refresh_task = asyncio.create_task(self._background_refresh())
+            return self._get_available_tools()
+        
+        await self._refresh_tools()
+        return self._get_available_tools()
+    
+    async def _refresh_tools(self) -> None:
+        """Fetch the tool list and rebuild the tools if their schemas changed"""
+        session = await self._ensure_session()
+        timeout = self._timeout
         
         try:
             self.log_info("Loading tools from MCP server")
             
-            # Create new connection for tool loading
-            timeout = self.get_config_value("timeout", 30)
+            async with self._call_lock, asyncio.timeout(timeout):
+                try:
+                    result = await session.list_tools()
+                except Exception as e:
+                    if self._is_session_closed(e):
+                        # Reconnect on the next call instead of reusing a dead session
+                        await self._close_session(session)
+                    raise
+                schema_hash = self._hash_tool_schemas(result.tools)
+                
+                if schema_hash == self._schema_hash and self.tools:
+                    self._tools_fetched_at = time.monotonic()
+                    return
+                
+            # Build the tools from the listing we already have instead of
+            # letting load_mcp_tools issue a second list_tools round-trip
+            tools = [
+                convert_mcp_tool_to_langchain_tool(self._tool_session, tool)
+                for tool in result.tools
+            ]
             
-            if self.server_params is None:
-                raise PluginConnectionError("Server parameters not initialized")
+            if self._schema_hash is not None:
+                self.log_warning("MCP tool schemas changed, replacing stale tools")
             
-            async with asyncio.timeout(timeout):
-                async with stdio_client(self.server_params) as (read_stream, write_stream):
-                    session = ClientSession(read_stream, write_stream)
-                    await session.initialize()
-                    
-                    # Load MCP tools
-                    tools = await load_mcp_tools(session)
-                    
-                    if not tools:
-                        self.log_warning("No tools loaded from MCP server")
-                        return []
-                    
-                    self.tools = tools
-                    self.log_info(f"Loaded {len(tools)} tools from MCP server")
-                    
-                    # Log tool information
-                    for tool in tools:
-                        if hasattr(tool, 'name'):
-                            self.log_info(f"  - {tool.name}: {getattr(tool, 'description', 'No description')}")
-                    
-                    return tools
+            self._schema_hash = schema_hash
+            self._tools_fetched_at = time.monotonic()
+            self.unavailable_tools.clear()
+            self.tools = tools
+            
+            if not tools:
+                self.log_warning("No tools loaded from MCP server")
+                return
+            
+            self.log_info(f"Loaded {len(tools)} tools from MCP server")
+            
+            # Log tool information once; only built when debug logging is on
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.log_debug(
+                    "tools=%s",
+                    {tool.name: getattr(tool, "description", "") for tool in tools if hasattr(tool, "name")}
+                )
         
         except asyncio.TimeoutError:
             error_msg = f"MCP server connection timeout after {timeout} seconds"
@@ -101,30 +271,101 @@ class MCPPlugin(BasePlugin):
             self.log_error(f"Failed to load tools from MCP server: {e}")
             raise PluginConnectionError(f"Failed to load MCP tools: {e}")
     
+    async def _background_refresh(self) -> None:
+        """Refresh the tool list without failing any caller"""
+        try:
+            await self._refresh_tools()
+        except PluginConnectionError:
+            # Keep serving the cached tools; the next expired load retries
+            pass
+    
+    @staticmethod
+    def _hash_tool_schemas(tools: List[Any]) -> str:
+        """Hash tool names and schemas to detect drift between fetches"""
+        # Serialize with pydantic's native encoder instead of
+        # building dicts and re-encoding them through json.dumps
+        digest = hashlib.sha256()
+        for tool in tools:
+            digest.update(tool.model_dump_json().encode())
+            digest.update(b"\n")
+        return digest.hexdigest()
+    
+    def _get_available_tools(self) -> List[Any]:
+        """Get cached tools minus the ones that failed recently at call time"""
+        if not self.unavailable_tools:
+            return self.tools
+        
+        # Give hidden tools another chance once the tool TTL has passed
+        cutoff = time.monotonic() - self._tools_ttl
+        for tool_name, failed_at in list(self.unavailable_tools.items()):
+            if failed_at <= cutoff:
+                del self.unavailable_tools[tool_name]
+        
+        return [tool for tool in self.tools if tool.name not in self.unavailable_tools]
+    
+    @staticmethod
+    def _is_unknown_tool(result: Any) -> bool:
+        """Check whether a tool result reports that the server has no such tool"""
+        return result.isError and any(
+            getattr(content, "text", "").startswith("Unknown tool") for content in result.content
+        )
+    
+    def get_tool_names(self) -> List[str]:
+        """Get names of the tools that are currently available"""
+        return [tool.name for tool in self._get_available_tools()]
+    
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any], **kwargs: Any) -> Any:
+        """Call a tool on the MCP server"""
+        session = await self._ensure_session()
+        
+        try:
+            async with self._call_lock:
+                result = await session.call_tool(tool_name, arguments, **kwargs)
+        except Exception as e:
+            if not self._is_session_closed(e):
+                raise
+            # Reconnect on the next call instead of reusing a dead session,
+            # and hide the tool in case it is what brought the server down
+            await self._close_session(session)
+            self.unavailable_tools[tool_name] = time.monotonic()
+            self.log_error(f"MCP server connection lost during {tool_name}: {e}")
+            raise PluginConnectionError(f"MCP server connection lost: {e}")
+        
+        # Hide tools the server no longer knows so the model stops calling
+        # them; other tool errors, such as bad arguments, are the model's to fix
+        if self._is_unknown_tool(result):
+            self.unavailable_tools[tool_name] = time.monotonic()
+        elif not result.isError:
+            self.unavailable_tools.pop(tool_name, None)
+        
+        return result
+    
     async def _test_mcp_connection(self) -> None:
-        """Test MCP server connection"""
+        """Test MCP server connection by pinging the persistent session"""
         try:
             self.log_info("Testing MCP server connection")
             
-            timeout = self.get_config_value("timeout", 30)
+            session = await self._ensure_session()
             
-            if self.server_params is None:
-                raise PluginConnectionError("Server parameters not initialized")
+            async with self._call_lock, asyncio.timeout(self._timeout):
+                try:
+                    await session.send_ping()
+                except Exception as e:
+                    if self._is_session_closed(e):
+                        await self._close_session(session)
+                    raise
             
-            async with asyncio.timeout(timeout):
-                async with stdio_client(self.server_params) as (read_stream, write_stream):
-                    session = ClientSession(read_stream, write_stream)
-                    await session.initialize()
-                    
-                    # Test basic connection
-                    self._connection_active = True
-                    self.log_info("MCP server connection successful")
+            self._connection_active = True
+            self.log_info("MCP server connection successful")
         
         except asyncio.TimeoutError:
-            error_msg = f"MCP server connection timeout after {timeout} seconds"
+            error_msg = f"MCP server ping timeout after {self._timeout} seconds"
             self.log_error(error_msg)
             raise PluginConnectionError(error_msg)
         
+        except PluginConnectionError:
+            raise
+        
         except Exception as e:
             self.log_error(f"MCP server connection failed: {e}")
             raise PluginConnectionError(f"MCP server connection failed: {e}")
@@ -134,12 +375,17 @@ class MCPPlugin(BasePlugin):
         try:
             self.log_info("Cleaning up MCP plugin")
             
-            if self.session:
-                # Close session if it exists
-                self.session = None
+            if self._refresh_task and not self._refresh_task.done():
+                self._refresh_task.cancel()
+            self._refresh_task = None
+            
+            # Close the persistent session and stop the server process
+            await self._close_session()
             
-            self._connection_active = False
             self.tools = []
+            self._schema_hash = None
+            self._tools_fetched_at = 0.0
+            self.unavailable_tools.clear()
             self.is_initialized = False
             
             self.log_info("MCP plugin cleanup completed")
@@ -154,8 +400,9 @@ class MCPPlugin(BasePlugin):
             "type": "mcp",
             "version": "1.0.0",
             "description": "Model Context Protocol integration plugin",
-            "command": self.get_config_value("command"),
+            "command": self._command,
             "connection_active": self._connection_active,
+            "deferred_init": self._deferred_init,
             "tools_loaded": len(self.tools),
             "supported_features": [
                 "stdio_transport",
@@ -171,7 +418,7 @@ class MCPPlugin(BasePlugin):
         
         # Add MCP-specific health information
         mcp_health = {
-            "mcp_command": self.get_config_value("command"),
+            "mcp_command": self._command,
             "connection_active": self._connection_active,
             "server_accessible": False
         }
@@ -179,6 +426,7 @@ class MCPPlugin(BasePlugin):
         # Test server accessibility
         try:
             await self._test_mcp_connection()
+            mcp_health["connection_active"] = self._connection_active
             mcp_health["server_accessible"] = True
         except Exception as e:
             mcp_health["server_error"] = str(e)
@@ -192,19 +440,17 @@ class MCPPlugin(BasePlugin):
             return False
         
         # Check required configuration
-        command = self.get_config_value("command")
-        if not command or not isinstance(command, str):
+        if not self._command:
             self.log_error("MCP command is required and must be a string")
             return False
         
         # Check if command is executable
-        command_parts = command.split()
-        if not command_parts:
+        if not self._command_parts:
             self.log_error("MCP command cannot be empty")
             return False
         
         # Validate timeout
-        timeout = self.get_config_value("timeout", 30)
+        timeout = self._timeout
         if not isinstance(timeout, int) or timeout <= 0:
             self.log_error("MCP timeout must be a positive integer")
             return False
@@ -234,12 +480,12 @@ class MCPPlugin(BasePlugin):
     
     def get_mcp_command(self) -> str:
         """Get the MCP command being used"""
-        return self.get_config_value("command", "")
+        return self._command
     
     def get_timeout(self) -> int:
         """Get connection timeout"""
-        return self.get_config_value("timeout", 30)
+        return self._timeout
     
     def is_connected(self) -> bool:
         """Check if connection is active"""
-        return self._connection_active and self.is_initialized 
\ No newline at end of file
+        return self._connection_active and self.session is not None 
\ No newline at end of file
@@ -3,9 +3,12 @@ Plugin Manager
 Manages loading and lifecycle of plugins.
 """
 
+import asyncio
 import importlib
 import logging
-from typing import Dict, Any, List, Optional, Type
+import sys
+from contextlib import AsyncExitStack
+from typing import Dict, Any, List, Optional, Tuple, Type
 
 from .base_plugin import BasePlugin, PluginError, PluginInitializationError
 from .mcp_plugin import MCPPlugin
@@ -14,6 +17,76 @@ from config.plugin_config import get_plugin_type, get_plugin_config
 
 logger = logging.getLogger(__name__)
 
+# Resolved custom plugin classes, keyed by (module, class) name
+_CUSTOM_CLASS_CACHE: Dict[Tuple[str, str], Type[BasePlugin]] = {}
+
+class MCPHost:
+    """Routes tool calls across several persistent MCP server sessions"""
+    
+    def __init__(self):
+        self.plugins: Dict[str, MCPPlugin] = {}
+        # Tool name -> (server name, tool)
+        self.tool_registry: Dict[str, Tuple[str, Any]] = {}
+        # Tool list each server was last indexed from
+        self._indexed_tools: Dict[str, List[Any]] = {}
+    
+    async def add_server(self, server_name: str, plugin: MCPPlugin) -> None:
+        """Connect a server and index its tools, re-indexing when they change"""
+        # Served from the plugin's cache; a TTL or schema refresh, or a tool
+        # marked unavailable, hands back a different list
+        tools = await plugin.load_tools()
+        
+        indexed = self._indexed_tools.get(server_name)
+        if indexed is not None and len(indexed) == len(tools) and all(
+            old is new for old, new in zip(indexed, tools)
+        ):
+            return
+        
+        self._drop_tools(server_name)
+        self.plugins[server_name] = plugin
+        self._indexed_tools[server_name] = tools
+        for tool in tools:
+            if tool.name in self.tool_registry:
+                logger.warning(f"Tool {tool.name} from {server_name} shadows an existing tool")
+            self.tool_registry[tool.name] = (server_name, tool)
+        
+        logger.info(f"Registered {len(tools)} tools from MCP server: {server_name}")
+    
+    def _drop_tools(self, server_name: str) -> None:
+        """Remove a server's entries from the tool registry"""
+        self.tool_registry = {
+            name: entry for name, entry in self.tool_registry.items()
+            if entry[0] != server_name
+        }
+    
+    def remove_server(self, server_name: str) -> None:
+        """Forget a server and its tools"""
+        if self.plugins.pop(server_name, None) is None:
+            return
+        
+        self._indexed_tools.pop(server_name, None)
+        self._drop_tools(server_name)
+    
+    def get_tools(self) -> List[Any]:
+        """Get tools from every registered server"""
+        return [tool for _, tool in self.tool_registry.values()]
+    
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        """Dispatch a tool call to the server that provides it"""
+        entry = self.tool_registry.get(tool_name)
+        if entry is None:
+            raise PluginError(f"Unknown tool: {tool_name}")
+        
+        # The plugin serializes calls per server and tracks failing tools
+        server_name, _ = entry
+        return await self.plugins[server_name].call_tool(tool_name, arguments)
+    
+    def clear(self) -> None:
+        """Forget every server"""
+        self.plugins.clear()
+        self.tool_registry.clear()
+        self._indexed_tools.clear()
+
 class PluginManager:
     """Manages plugin loading and lifecycle"""
     
@@ -24,12 +97,18 @@ class PluginManager:
             "mcp": MCPPlugin,
             "api": APIPlugin
         }
+        # Shared stack that owns every loaded plugin's resources, through one
+        # nested stack per plugin so unloading can close just that plugin
+        self._exit_stack = AsyncExitStack()
+        self._plugin_stacks: Dict[str, AsyncExitStack] = {}
+        self.mcp_host = MCPHost()
         
     def register_plugin(self, plugin_type: str, plugin_class: Type[BasePlugin]) -> None:
         """Register a new plugin type"""
         if not issubclass(plugin_class, BasePlugin):
             raise ValueError(f"Plugin class must inherit from BasePlugin")
         
+        plugin_type = sys.intern(plugin_type)
         self.plugin_registry[plugin_type] = plugin_class
         logger.info(f"Registered plugin type: {plugin_type}")
     
@@ -38,9 +117,10 @@ class PluginManager:
         if plugin_type is None:
             plugin_type = get_plugin_type()
         
-        if plugin_type in self.plugins:
+        plugin = self.plugins.get(plugin_type)
+        if plugin is not None:
             logger.info(f"Plugin {plugin_type} already loaded")
-            return self.plugins[plugin_type]
+            return plugin
         
         try:
             logger.info(f"Loading plugin: {plugin_type}")
@@ -58,11 +138,17 @@ class PluginManager:
             if not plugin.validate_config():
                 raise PluginInitializationError(f"Invalid configuration for plugin: {plugin_type}")
             
-            # Initialize plugin
-            await plugin.initialize()
+            # Initialize plugin (lazy plugins connect on first use)
+            if not config.get("lazy", False):
+                await plugin.initialize()
             
-            # Store plugin
+            # Store plugin and register its cleanup on the shared stack
+            plugin_type = sys.intern(plugin_type)
+            plugin_stack = AsyncExitStack()
+            plugin_stack.push_async_callback(plugin.cleanup)
+            await self._exit_stack.enter_async_context(plugin_stack)
             self.plugins[plugin_type] = plugin
+            self._plugin_stacks[plugin_type] = plugin_stack
             self.active_plugin = plugin
             
             logger.info(f"Successfully loaded plugin: {plugin_type}")
@@ -72,10 +158,34 @@ class PluginManager:
             logger.error(f"Failed to load plugin {plugin_type}: {e}")
             raise PluginError(f"Failed to load plugin {plugin_type}: {e}")
     
+    async def load_plugins(self, plugin_types: List[str]) -> List[BasePlugin]:
+        """Load several plugins concurrently"""
+        # Drop duplicates so the same plugin type is not initialized twice
+        plugin_types = list(dict.fromkeys(plugin_types))
+        previous_active = self.active_plugin
+        
+        results = await asyncio.gather(
+            *(self.load_plugin(plugin_type) for plugin_type in plugin_types),
+            return_exceptions=True
+        )
+        
+        plugins = []
+        for plugin_type, result in zip(plugin_types, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Failed to load plugin {plugin_type}: {result}")
+            else:
+                plugins.append(result)
+        
+        # Completion order is arbitrary, so pick the active plugin by request order
+        self.active_plugin = previous_active or (plugins[0] if plugins else None)
+        
+        return plugins
+    
     async def _get_plugin_class(self, plugin_type: str) -> Type[BasePlugin]:
         """Get plugin class for the specified type"""
-        if plugin_type in self.plugin_registry:
-            return self.plugin_registry[plugin_type]
+        plugin_class = self.plugin_registry.get(sys.intern(plugin_type))
+        if plugin_class is not None:
+            return plugin_class
         
         # Try to load custom plugin
         if plugin_type == "custom":
@@ -93,6 +203,12 @@ class PluginManager:
             if not module_name or not class_name:
                 raise PluginError("Custom plugin module and class must be specified")
             
+            # Reloads reuse the class validated on first load
+            key = (module_name, class_name)
+            plugin_class = _CUSTOM_CLASS_CACHE.get(key)
+            if plugin_class is not None:
+                return plugin_class
+            
             # Import module
             module = importlib.import_module(module_name)
             
@@ -102,6 +218,7 @@ class PluginManager:
             if not issubclass(plugin_class, BasePlugin):
                 raise PluginError(f"Custom plugin class {class_name} must inherit from BasePlugin")
             
+            _CUSTOM_CLASS_CACHE[key] = plugin_class
             return plugin_class
             
         except Exception as e:
@@ -121,9 +238,21 @@ class PluginManager:
     
     async def get_plugin_tools(self, plugin_type: str = None) -> List[Any]:
         """Get tools from a plugin"""
+        if plugin_type is None:
+            plugin_type = get_plugin_type()
+        
         plugin = await self.load_plugin(plugin_type)
+        if isinstance(plugin, MCPPlugin):
+            # MCP tools are served from the unified registry across servers
+            await self.mcp_host.add_server(plugin_type, plugin)
+            return self.mcp_host.get_tools()
+        
         return await plugin.load_tools()
     
+    async def call_tool(self, tool_name: str, arguments: Dict[str, Any]) -> Any:
+        """Call an MCP tool by name on whichever server provides it"""
+        return await self.mcp_host.call_tool(tool_name, arguments)
+    
     async def reload_plugin(self, plugin_type: str = None) -> BasePlugin:
         """Reload a plugin"""
         if plugin_type is None:
@@ -137,10 +266,17 @@ class PluginManager:
     
     async def unload_plugin(self, plugin_type: str) -> None:
         """Unload a plugin"""
-        if plugin_type in self.plugins:
-            plugin = self.plugins[plugin_type]
-            await plugin.cleanup()
-            del self.plugins[plugin_type]
+        plugin = self.plugins.pop(plugin_type, None)
+        if plugin is not None:
+            self.mcp_host.remove_server(plugin_type)
+            
+            # Closing the plugin's own stack runs its cleanup once and empties
+            # the entry, so cleanup_all neither repeats it nor keeps the plugin
+            plugin_stack = self._plugin_stacks.pop(plugin_type, None)
+            if plugin_stack is not None:
+                await plugin_stack.aclose()
+            else:
+                await plugin.cleanup()
             
             if self.active_plugin == plugin:
                 self.active_plugin = None
@@ -149,8 +285,15 @@ class PluginManager:
     
     async def cleanup_all(self) -> None:
         """Clean up all plugins"""
-        for plugin_type in list(self.plugins.keys()):
-            await self.unload_plugin(plugin_type)
+        # Closing the shared stack runs every plugin cleanup in reverse load order
+        await self._exit_stack.aclose()
+        self._exit_stack = AsyncExitStack()
+        self._plugin_stacks.clear()
+        
+        self.mcp_host.clear()
+        self.plugins.clear()
+        self.active_plugin = None
+        logger.info("Unloaded all plugins")
     
     def get_loaded_plugins(self) -> List[str]:
         """Get list of loaded plugin types"""
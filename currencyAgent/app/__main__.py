@@ -1,6 +1,5 @@
 import argparse
 import logging
-import os
 import sys
 
 import uvicorn
@@ -13,17 +12,13 @@ from a2a.types import (
     AgentCard,
     AgentSkill,
 )
-from pathlib import Path
-from dotenv import load_dotenv
 
-from app.agent import CurrencyAgent
+from app.config import settings
+from app.agent import CurrencyAgent, aclose_http_client
 from app.agent_executor import CurrencyAgentExecutor
+from app.task_store import RedisTaskStore
 
 
-# Load environment variables from .env file in project root
-project_root = Path(__file__).parent.parent.parent
-load_dotenv(dotenv_path=project_root / ".env")
-
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
@@ -32,6 +27,49 @@ class MissingAPIKeyError(Exception):
     """Exception for missing API key."""
 
 
+# Card contents are constant, so they are built and validated once at import
+CAPABILITIES = AgentCapabilities(streaming=True)
+
+# Enhanced skills with currency codes for better orchestrator routing
+CURRENCY_SKILLS = [
+    AgentSkill(
+        id="currency_exchange",
+        name="Currency exchange operations",
+        description="Currency exchange operations and rate lookups",
+        tags=["currency", "exchange", "usd", "eur", "inr", "gbp", "jpy", "dollar"],
+        examples=["What is exchange rate between USD and GBP?", "Convert 100 USD to EUR"]
+    ),
+    AgentSkill(
+        id="financial_data",
+        name="Financial data analysis",
+        description="Financial data analysis and currency information",
+        tags=["financial", "data", "usd", "eur", "dollar", "money"],
+        examples=["Get financial data for EUR", "Show me currency trends"]
+    ),
+    AgentSkill(
+        id="market_analysis",
+        name="Market analysis and trends",
+        description="Market analysis and currency trends",
+        tags=["market", "analysis", "bitcoin", "crypto"],
+        examples=["Analyze currency market trends", "Bitcoin price analysis"]
+    ),
+    AgentSkill(
+        id="rate_conversion",
+        name="Currency rate conversion",
+        description="Currency rate conversion and calculations",
+        tags=["conversion", "rates", "usd", "eur", "inr", "dollar"],
+        examples=["Convert 50 USD to INR", "Calculate exchange rates"]
+    ),
+    AgentSkill(
+        id="historical_data",
+        name="Historical financial data",
+        description="Historical financial data and currency rates",
+        tags=["historical", "data"],
+        examples=["Historical USD to EUR rates", "Past currency data"]
+    )
+]
+
+
 def main():
     """Starts the Currency Agent server."""
     parser = argparse.ArgumentParser(
@@ -54,52 +92,11 @@ def main():
     port = args.port
     
     try:
-        if not os.getenv('OPENAI_API_KEY'):
+        if not settings().openai_api_key:
             raise MissingAPIKeyError(
                 'OPENAI_API_KEY environment variable not set. Please set it in the .env file.'
             )
     
-        capabilities = AgentCapabilities(streaming=True)
-        
-        # Enhanced skills with currency codes for better orchestrator routing
-        currency_skills = [
-            AgentSkill(
-                id="currency_exchange",
-                name="Currency exchange operations",
-                description="Currency exchange operations and rate lookups",
-                tags=["currency", "exchange", "usd", "eur", "inr", "gbp", "jpy", "dollar"],
-                examples=["What is exchange rate between USD and GBP?", "Convert 100 USD to EUR"]
-            ),
-            AgentSkill(
-                id="financial_data",
-                name="Financial data analysis",
-                description="Financial data analysis and currency information",
-                tags=["financial", "data", "usd", "eur", "dollar", "money"],
-                examples=["Get financial data for EUR", "Show me currency trends"]
-            ),
-            AgentSkill(
-                id="market_analysis",
-                name="Market analysis and trends",
-                description="Market analysis and currency trends",
-                tags=["market", "analysis", "bitcoin", "crypto"],
-                examples=["Analyze currency market trends", "Bitcoin price analysis"]
-            ),
-            AgentSkill(
-                id="rate_conversion",
-                name="Currency rate conversion",
-                description="Currency rate conversion and calculations",
-                tags=["conversion", "rates", "usd", "eur", "inr", "dollar"],
-                examples=["Convert 50 USD to INR", "Calculate exchange rates"]
-            ),
-            AgentSkill(
-                id="historical_data",
-                name="Historical financial data",
-                description="Historical financial data and currency rates",
-                tags=["historical", "data"],
-                examples=["Historical USD to EUR rates", "Past currency data"]
-            )
-        ]
-        
         agent_card = AgentCard(
             name='Currency Agent',
             description='Handles currency exchange and financial data',
@@ -107,20 +104,28 @@ def main():
             version='1.0.0',
             defaultInputModes=CurrencyAgent.SUPPORTED_CONTENT_TYPES,
             defaultOutputModes=CurrencyAgent.SUPPORTED_CONTENT_TYPES,
-            capabilities=capabilities,
-            skills=currency_skills,
+            capabilities=CAPABILITIES,
+            skills=CURRENCY_SKILLS,
         )
 
+        # Share tasks through Redis when configured so any process can serve polls
+        redis_url = settings().redis_url
+        task_store = RedisTaskStore(redis_url) if redis_url else InMemoryTaskStore()
+        shutdown_handlers = [aclose_http_client]
+        if redis_url:
+            shutdown_handlers.append(task_store.aclose)
+
         # --8<-- [start:DefaultRequestHandler]
         request_handler = DefaultRequestHandler(
             agent_executor=CurrencyAgentExecutor(),
-            task_store=InMemoryTaskStore(),
+            task_store=task_store,
         )
         server = A2AStarletteApplication(
             agent_card=agent_card, http_handler=request_handler
         )
 
-        uvicorn.run(server.build(), host=host, port=port)
+        # Single worker per process; scale out with more processes sharing REDIS_URL
+        uvicorn.run(server.build(on_shutdown=shutdown_handlers), host=host, port=port, loop="uvloop", http="httptools")
         # --8<-- [end:DefaultRequestHandler]
 
     except MissingAPIKeyError as e:
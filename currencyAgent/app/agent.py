@@ -1,11 +1,8 @@
 from collections.abc import AsyncIterable
-from pathlib import Path
 from typing import Any, Literal
 
 import httpx
-import os
 
-from dotenv import load_dotenv
 from langchain_core.messages import AIMessage, ToolMessage
 from langchain_core.tools import tool
 from langchain_openai import ChatOpenAI
@@ -13,21 +10,31 @@ from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import create_react_agent
 from pydantic import BaseModel
 
-# Load environment variables from .env file in project root
-project_root = Path(__file__).parent.parent.parent
-load_dotenv(dotenv_path=project_root / ".env")
-
-# LangSmith tracing
-os.environ.setdefault("LANGCHAIN_TRACING_V2", "true")
-os.environ.setdefault("LANGCHAIN_ENDPOINT", os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com"))
-os.environ.setdefault("LANGCHAIN_API_KEY", os.getenv("LANGSMITH_API_KEY", ""))
-os.environ.setdefault("LANGCHAIN_PROJECT", os.getenv("LANGSMITH_PROJECT", "03892bba-bf1e-4c69-82d9-1058208e56ae"))
+from app.config import settings
 
 memory = MemorySaver()
 
+_http_client: httpx.AsyncClient | None = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Get the pooled client for exchange rate lookups, created on first use"""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(timeout=httpx.Timeout(10.0, connect=5.0))
+    return _http_client
+
+
+async def aclose_http_client() -> None:
+    """Close the pooled client on shutdown"""
+    global _http_client
+    client, _http_client = _http_client, None
+    if client is not None:
+        await client.aclose()
+
 
 @tool
-def get_exchange_rate(
+async def get_exchange_rate(
     currency_from: str = 'USD',
     currency_to: str = 'EUR',
     currency_date: str = 'latest',
@@ -45,7 +52,8 @@ def get_exchange_rate(
         the request fails.
     """
     try:
-        response = httpx.get(
+        # Async request so the lookup never blocks the server's event loop
+        response = await get_http_client().get(
             f'https://api.frankfurter.app/{currency_date}',
             params={'from': currency_from, 'to': currency_to},
         )
@@ -85,7 +93,7 @@ class CurrencyAgent:
     def __init__(self):
         self.model = ChatOpenAI(
             model="gpt-4o",
-            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            openai_api_key=settings().openai_api_key,
             temperature=1  # Use default temperature (some models don't support 0)
         )
         self.tools = [get_exchange_rate]
@@ -98,16 +106,16 @@ class CurrencyAgent:
             response_format=ResponseFormat,
         )
 
-    def invoke(self, query, context_id) -> str:
+    async def invoke(self, query, context_id) -> str:
         config = {'configurable': {'thread_id': context_id}}
-        self.graph.invoke({'messages': [('user', query)]}, config)
+        await self.graph.ainvoke({'messages': [('user', query)]}, config)
         return self.get_agent_response(config)
 
     async def stream(self, query, context_id) -> AsyncIterable[dict[str, Any]]:
         inputs = {'messages': [('user', query)]}
         config = {'configurable': {'thread_id': context_id}}
 
-        for item in self.graph.stream(inputs, config, stream_mode='values'):
+        async for item in self.graph.astream(inputs, config, stream_mode='values'):
             message = item['messages'][-1]
             if (
                 isinstance(message, AIMessage)
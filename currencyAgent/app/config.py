@@ -0,0 +1,40 @@
+"""
+Settings loaded once from the project .env file
+"""
+import functools
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+from dotenv import load_dotenv
+
+# The .env file lives in the project root
+project_root = Path(__file__).parent.parent.parent
+
+
+@dataclass(frozen=True)
+class Settings:
+    openai_api_key: Optional[str]
+    # Tasks are kept in Redis when set, so several server processes can share them
+    redis_url: Optional[str] = None
+
+
+@functools.lru_cache(maxsize=1)
+def settings() -> Settings:
+    """Load the .env file and LangSmith defaults on first use"""
+    load_dotenv(dotenv_path=project_root / ".env")
+    
+    # LangSmith tracing, only enabled with a real key; an empty key makes
+    # every chain step send rejected (and retried) trace uploads
+    langsmith_api_key = os.getenv("LANGSMITH_API_KEY")
+    if langsmith_api_key:
+        os.environ.setdefault("LANGCHAIN_TRACING_V2", "true")
+        os.environ.setdefault("LANGCHAIN_ENDPOINT", os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com"))
+        os.environ.setdefault("LANGCHAIN_API_KEY", langsmith_api_key)
+        os.environ.setdefault("LANGCHAIN_PROJECT", os.getenv("LANGSMITH_PROJECT", "03892bba-bf1e-4c69-82d9-1058208e56ae"))
+    
+    return Settings(
+        openai_api_key=os.getenv("OPENAI_API_KEY"),
+        redis_url=os.getenv("REDIS_URL"),
+    )
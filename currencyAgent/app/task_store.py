@@ -0,0 +1,49 @@
+"""
+Redis-backed A2A task store shared by every server process
+"""
+import os
+
+import redis.asyncio as redis
+
+from a2a.server.context import ServerCallContext
+from a2a.server.tasks import TaskStore
+from a2a.types import Task
+
+# Seconds a task is kept after its last update, overridable with TASK_TTL_SECONDS
+DEFAULT_TASK_TTL = 24 * 60 * 60
+
+
+class RedisTaskStore(TaskStore):
+    """Task store keeping each task as JSON in a Redis hash at task:{id}"""
+
+    def __init__(self, url: str, ttl: int | None = None):
+        self.redis = redis.Redis.from_url(url)
+        # Every save refreshes the expiry, so finished tasks age out
+        self.ttl = ttl if ttl is not None else int(os.getenv("TASK_TTL_SECONDS", DEFAULT_TASK_TTL))
+
+    @staticmethod
+    def _key(task_id: str) -> str:
+        return f"task:{task_id}"
+
+    async def save(self, task: Task, context: ServerCallContext | None = None) -> None:
+        """Save or update a task"""
+        key = self._key(task.id)
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.hset(key, "task", task.model_dump_json())
+            pipe.expire(key, self.ttl)
+            await pipe.execute()
+
+    async def get(self, task_id: str, context: ServerCallContext | None = None) -> Task | None:
+        """Get a task by id"""
+        data = await self.redis.hget(self._key(task_id), "task")
+        if data is None:
+            return None
+        return Task.model_validate_json(data)
+
+    async def delete(self, task_id: str, context: ServerCallContext | None = None) -> None:
+        """Delete a task by id"""
+        await self.redis.delete(self._key(task_id))
+
+    async def aclose(self) -> None:
+        """Close the Redis connection pool"""
+        await self.redis.aclose()
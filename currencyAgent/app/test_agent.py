@@ -2,7 +2,7 @@
 Simple pytest tests for CurrencyAgent
 """
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import AsyncMock, Mock, patch
 import os
 from app.agent import CurrencyAgent, get_exchange_rate, ResponseFormat
 
@@ -36,8 +36,9 @@ class TestCurrencyAgent:
         assert callable(get_exchange_rate)
         assert hasattr(get_exchange_rate, 'name')
     
-    @patch('httpx.get')
-    def test_get_exchange_rate_tool_success(self, mock_get):
+    @pytest.mark.asyncio
+    @patch('app.agent.get_http_client')
+    async def test_get_exchange_rate_tool_success(self, mock_get_client):
         """Test get_exchange_rate tool with successful API response"""
         mock_response = Mock()
         mock_response.json.return_value = {
@@ -45,10 +46,10 @@ class TestCurrencyAgent:
             'base': 'USD'
         }
         mock_response.raise_for_status = Mock()
-        mock_get.return_value = mock_response
+        mock_get_client.return_value.get = AsyncMock(return_value=mock_response)
         
-        # Use invoke() method for LangChain tools
-        result = get_exchange_rate.invoke({'currency_from': 'USD', 'currency_to': 'EUR', 'currency_date': 'latest'})
+        # Use ainvoke() method for async LangChain tools
+        result = await get_exchange_rate.ainvoke({'currency_from': 'USD', 'currency_to': 'EUR', 'currency_date': 'latest'})
         assert 'rates' in result or 'error' not in result
     
     def test_get_agent_response_structure(self):
@@ -6,7 +6,6 @@ Mathematical calculations, equation solving, calculus, statistics, and matrix op
 
 import argparse
 import logging
-import os
 import sys
 
 import uvicorn
@@ -19,18 +18,17 @@ from a2a.types import (
     AgentCard,
     AgentSkill,
 )
-from pathlib import Path
-from dotenv import load_dotenv
 
-from app.agent import MathAgent
+from app.config import settings
+from app.agent import MathAgent, get_math_agent
 from app.agent_executor import MathAgentExecutor
+from app.task_store import RedisTaskStore
 
 
-# Load environment variables from .env file in project root
-project_root = Path(__file__).parent.parent.parent
-load_dotenv(dotenv_path=project_root / ".env")
-
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s %(message)s"
+)
 logger = logging.getLogger(__name__)
 
 
@@ -38,6 +36,49 @@ class MissingAPIKeyError(Exception):
     """Exception for missing API key."""
 
 
+# Card contents are constant, so they are built and validated once at import
+CAPABILITIES = AgentCapabilities(streaming=True)
+
+# Math skills with comprehensive tags for better orchestrator routing
+MATH_SKILLS = [
+    AgentSkill(
+        id="arithmetic_calculation",
+        name="Arithmetic Calculation",
+        description="Perform basic and advanced arithmetic calculations",
+        tags=["math", "calculation", "arithmetic", "compute", "calculate", "add", "subtract", "multiply", "divide", "power", "sqrt", "sin", "cos", "tan", "log", "exp", "what is", "plus", "minus", "times", "+", "-", "*", "/", "^", "sum", "product", "number", "numbers"],
+        examples=["Calculate 2 + 2", "What is sin(pi/4)?", "Compute sqrt(16)"]
+    ),
+    AgentSkill(
+        id="equation_solving",
+        name="Equation Solving",
+        description="Solve algebraic equations and systems of equations",
+        tags=["equation", "solve", "algebra", "polynomial", "quadratic", "linear", "system", "roots", "solutions"],
+        examples=["Solve x^2 - 4 = 0", "Find roots of 2x + 5 = 11"]
+    ),
+    AgentSkill(
+        id="calculus_operations",
+        name="Calculus Operations", 
+        description="Calculate derivatives and integrals of mathematical functions",
+        tags=["calculus", "derivative", "integral", "differentiate", "integrate", "limit", "function", "dx", "dy"],
+        examples=["Find derivative of x^2 + 3x + 2", "Integrate x^2 dx"]
+    ),
+    AgentSkill(
+        id="matrix_operations",
+        name="Matrix Operations",
+        description="Perform matrix calculations including multiplication, inversion, determinant",
+        tags=["matrix", "linear", "algebra", "determinant", "inverse", "transpose", "multiply", "eigenvalue", "vector"],
+        examples=["Determinant of [[1,2],[3,4]]", "Multiply matrices"]
+    ),
+    AgentSkill(
+        id="statistics_analysis",
+        name="Statistics Analysis",
+        description="Calculate statistical measures and analyze data sets",
+        tags=["statistics", "stats", "mean", "median", "mode", "standard", "deviation", "variance", "data", "analysis"],
+        examples=["Mean of [1,2,3,4,5]", "Standard deviation of data"]
+    )
+]
+
+
 def main():
     """Starts the Math Agent server."""
     parser = argparse.ArgumentParser(
@@ -60,51 +101,13 @@ def main():
     port = args.port
     
     try:
-        if not os.getenv('OPENAI_API_KEY'):
+        if not settings().openai_api_key:
             raise MissingAPIKeyError(
                 'OPENAI_API_KEY environment variable not set. Please set it in the .env file.'
             )
     
-        capabilities = AgentCapabilities(streaming=True)
-        
-        # Math skills with comprehensive tags for better orchestrator routing
-        math_skills = [
-            AgentSkill(
-                id="arithmetic_calculation",
-                name="Arithmetic Calculation",
-                description="Perform basic and advanced arithmetic calculations",
-                tags=["math", "calculation", "arithmetic", "compute", "calculate", "add", "subtract", "multiply", "divide", "power", "sqrt", "sin", "cos", "tan", "log", "exp", "what is", "plus", "minus", "times", "+", "-", "*", "/", "^", "sum", "product", "number", "numbers"],
-                examples=["Calculate 2 + 2", "What is sin(pi/4)?", "Compute sqrt(16)"]
-            ),
-            AgentSkill(
-                id="equation_solving",
-                name="Equation Solving",
-                description="Solve algebraic equations and systems of equations",
-                tags=["equation", "solve", "algebra", "polynomial", "quadratic", "linear", "system", "roots", "solutions"],
-                examples=["Solve x^2 - 4 = 0", "Find roots of 2x + 5 = 11"]
-            ),
-            AgentSkill(
-                id="calculus_operations",
-                name="Calculus Operations", 
-                description="Calculate derivatives and integrals of mathematical functions",
-                tags=["calculus", "derivative", "integral", "differentiate", "integrate", "limit", "function", "dx", "dy"],
-                examples=["Find derivative of x^2 + 3x + 2", "Integrate x^2 dx"]
-            ),
-            AgentSkill(
-                id="matrix_operations",
-                name="Matrix Operations",
-                description="Perform matrix calculations including multiplication, inversion, determinant",
-                tags=["matrix", "linear", "algebra", "determinant", "inverse", "transpose", "multiply", "eigenvalue", "vector"],
-                examples=["Determinant of [[1,2],[3,4]]", "Multiply matrices"]
-            ),
-            AgentSkill(
-                id="statistics_analysis",
-                name="Statistics Analysis",
-                description="Calculate statistical measures and analyze data sets",
-                tags=["statistics", "stats", "mean", "median", "mode", "standard", "deviation", "variance", "data", "analysis"],
-                examples=["Mean of [1,2,3,4,5]", "Standard deviation of data"]
-            )
-        ]
+        # Build the agent only once the API key is known to be set
+        math_agent = get_math_agent()
         
         agent_card = AgentCard(
             name='Math Agent',
@@ -113,28 +116,46 @@ def main():
             version='1.0.0',
             defaultInputModes=MathAgent.SUPPORTED_CONTENT_TYPES,
             defaultOutputModes=MathAgent.SUPPORTED_CONTENT_TYPES,
-            capabilities=capabilities,
-            skills=math_skills,
+            capabilities=CAPABILITIES,
+            skills=MATH_SKILLS,
         )
 
+        # Share tasks through Redis when configured so any process can serve polls
+        redis_url = settings().redis_url
+        task_store = RedisTaskStore(redis_url) if redis_url else InMemoryTaskStore()
+        shutdown_handlers = [math_agent.aclose]
+        if redis_url:
+            shutdown_handlers.append(task_store.aclose)
+
         # Create request handler with math agent executor
         request_handler = DefaultRequestHandler(
-            agent_executor=MathAgentExecutor(),
-            task_store=InMemoryTaskStore(),
+            agent_executor=MathAgentExecutor(agent=math_agent),
+            task_store=task_store,
         )
         server = A2AStarletteApplication(
             agent_card=agent_card, http_handler=request_handler
         )
 
-        print(f"Starting Math Agent on port {port}")
-        print("Available capabilities (via MCP):")
-        print("  • Arithmetic calculations (2+2, sin(pi/4), sqrt(16))")
-        print("  • Equation solving (x^2 - 4 = 0)")
-        print("  • Calculus (derivatives and integrals)")
-        print("  • Matrix operations (multiply, inverse, determinant)")
-        print("  • Statistics (mean, median, std dev, etc.)")
+        logger.info(
+            "Starting Math Agent on %s:%s with skills: %s",
+            host, port, ", ".join(skill.name for skill in MATH_SKILLS),
+            extra={"host": host, "port": port, "skills": [skill.id for skill in MATH_SKILLS]}
+        )
 
-        uvicorn.run(server.build(), host=host, port=port)
+        # Warm the MCP session and graph at startup, and stop the persistent
+        # math MCP server when uvicorn shuts down
+        # Single worker: the MCP session is per process; scale out with
+        # more processes sharing REDIS_URL
+        uvicorn.run(
+            server.build(
+                on_startup=[math_agent.warm_up],
+                on_shutdown=shutdown_handlers
+            ),
+            host=host,
+            port=port,
+            loop="uvloop",
+            http="httptools"
+        )
 
     except MissingAPIKeyError as e:
         logger.error(f'Error: {e}')
@@ -3,48 +3,105 @@
 Math Agent using MCP (Model Context Protocol) Server
 """
 import asyncio
-import os
+import functools
+import logging
 import sys
+import time
 from pathlib import Path
-from typing import List
+from typing import List, Optional
 
-from dotenv import load_dotenv
+import anyio
 from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
 from langgraph.prebuilt import create_react_agent
 from mcp import ClientSession, StdioServerParameters
 from mcp.client.stdio import stdio_client
 from langchain_mcp_adapters.tools import load_mcp_tools
 
-# Load environment variables from .env file in project root
-project_root = Path(__file__).parent.parent.parent
-load_dotenv(dotenv_path=project_root / ".env")
+from app.config import settings
 
-# LangSmith tracing
-os.environ.setdefault("LANGCHAIN_TRACING_V2", "true")
-os.environ.setdefault("LANGCHAIN_ENDPOINT", os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com"))
-os.environ.setdefault("LANGCHAIN_API_KEY", os.getenv("LANGSMITH_API_KEY", ""))
-os.environ.setdefault("LANGCHAIN_PROJECT", os.getenv("LANGSMITH_PROJECT", "03892bba-bf1e-4c69-82d9-1058208e56ae"))
+logger = logging.getLogger(__name__)
 
 class MathAgent:
     """Math Agent using MCP server for mathematical operations"""
     
     SUPPORTED_CONTENT_TYPES = ['text', 'text/plain']
     
+    # Upper bound on the MCP handshake and tool listing, in seconds
+    MCP_SETUP_TIMEOUT = 10.0
+    
+    # Reconnect delay after the MCP server dies, doubled per consecutive failure
+    RECONNECT_BACKOFF = 0.5
+    RECONNECT_BACKOFF_MAX = 30.0
+    
+    # Raised by the stdio streams once the MCP server process has gone away
+    SESSION_CLOSED_ERRORS = (anyio.ClosedResourceError, anyio.BrokenResourceError, anyio.EndOfStream)
+    
     def __init__(self):
         self.agent = None
+        # Same graph with per-thread memory, for requests that carry a thread id
+        self._threaded_agent = None
+        self._checkpointer = MemorySaver()
+        self._tools: List = []
+        self._session: Optional[ClientSession] = None
+        # Task that enters and exits the MCP session, and the event that stops it
+        self._session_task: Optional[asyncio.Task] = None
+        self._session_stop: Optional[asyncio.Event] = None
+        self._session_lock = asyncio.Lock()
+        self._reconnect_failures = 0
+        # Monotonic time before which the server is not respawned
+        self._retry_at = 0.0
         self._initialize_model()
     
     def _initialize_model(self):
         """Initialize the OpenAI GPT-4o model"""
         self.model = ChatOpenAI(
             model="gpt-4o",
-            openai_api_key=os.getenv("OPENAI_API_KEY"),
+            openai_api_key=settings().openai_api_key,
             temperature=0
         )
     
-    async def _create_agent_with_mcp_tools(self):
-        """Create agent with MCP tools loaded from math server"""
+    async def _ensure_session(self):
+        """Start the math MCP server once and build the agent over its tools"""
+        if self.agent is not None:
+            return
+        
+        async with self._session_lock:
+            # Another request may have connected while we waited
+            if self.agent is not None:
+                return
+            
+            # Wait out the reconnect backoff while holding the lock, so
+            # concurrent requests queue behind it instead of respawning
+            delay = self._retry_at - time.monotonic()
+            if delay > 0:
+                logger.warning("Math MCP server connection lost, reconnecting in %.1fs", delay)
+                await asyncio.sleep(delay)
+            
+            ready = asyncio.get_running_loop().create_future()
+            stop = asyncio.Event()
+            task = asyncio.create_task(self._run_session(ready, stop))
+            try:
+                session, tools = await ready
+            except BaseException:
+                task.cancel()
+                raise
+            
+            print(f"Loaded {len(tools)} MCP tools:")
+            for tool in tools:
+                print(f"  - {tool.name}: {tool.description}")
+            
+            # Create agents with MCP tools, reused by every request
+            self._session_task = task
+            self._session_stop = stop
+            self._session = session
+            self._tools = tools
+            self._threaded_agent = create_react_agent(self.model, tools, checkpointer=self._checkpointer)
+            self.agent = create_react_agent(self.model, tools)
+    
+    async def _run_session(self, ready: asyncio.Future, stop: asyncio.Event):
+        """Own the MCP session for its whole life, so one task enters and exits it"""
         # Get the path to the math MCP server
         current_dir = Path(__file__).parent.parent
         math_server_path = current_dir / "math_mcp_server.py"
@@ -54,58 +111,102 @@ class MathAgent:
             args=[str(math_server_path)],
         )
         
-        async with stdio_client(server_params) as (read, write):
-            async with ClientSession(read, write) as session:
-                await session.initialize()
-                
-                # Load MCP tools
-                tools = await load_mcp_tools(session)
-                print(f"Loaded {len(tools)} MCP tools:")
-                for tool in tools:
-                    print(f"  - {tool.name}: {tool.description}")
-                
-                # Create agent with MCP tools
-                self.agent = create_react_agent(self.model, tools)
-                return session  # Return session to keep it alive
+        try:
+            async with stdio_client(server_params) as (read, write):
+                async with ClientSession(read, write) as session:
+                    # Fail fast instead of hanging the request on a stuck server
+                    async with asyncio.timeout(self.MCP_SETUP_TIMEOUT):
+                        await session.initialize()
+                        
+                        # Load MCP tools
+                        tools = await load_mcp_tools(session)
+                    
+                    ready.set_result((session, tools))
+                    await stop.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning("Error closing math MCP session: %s", e)
+        finally:
+            if not ready.done():
+                ready.cancel()
+    
+    async def _reconnect(self, failed_agent):
+        """Drop a dead MCP session and start a new one after a backoff delay"""
+        async with self._session_lock:
+            # Only the first caller to notice the failure tears the session
+            # down and schedules the retry
+            if self.agent is failed_agent:
+                await self.aclose()
+                delay = min(self.RECONNECT_BACKOFF * 2 ** self._reconnect_failures, self.RECONNECT_BACKOFF_MAX)
+                self._reconnect_failures += 1
+                self._retry_at = time.monotonic() + delay
+        
+        await self._ensure_session()
+    
+    async def warm_up(self):
+        """Pay the one-time startup costs before the first request arrives"""
+        try:
+            # Spawns the MCP server (importing sympy/numpy there), loads the
+            # tools and compiles the ReAct graph
+            await self._ensure_session()
+            
+            # Opt-in, since it spends tokens: opens the pooled OpenAI connection
+            if settings().warmup_model_ping:
+                await self.model.bind(max_tokens=1).ainvoke([HumanMessage(content="ping")])
+        except Exception:
+            # The first request retries the setup, so startup carries on
+            logger.exception("Math agent warm-up failed")
     
-    async def process_request(self, request: str) -> str:
+    def _graph_for(self, thread_id: Optional[str]):
+        """Pick the stateless graph or the one with conversation memory"""
+        return self._threaded_agent if thread_id else self.agent
+    
+    async def process_request(self, request: str, thread_id: Optional[str] = None) -> str:
         """Process a mathematical request using MCP tools"""
         try:
-            # Create agent with MCP tools for each request
-            # This ensures fresh connection each time
-            current_dir = Path(__file__).parent.parent
-            math_server_path = current_dir / "math_mcp_server.py"
+            await self._ensure_session()
             
-            server_params = StdioServerParameters(
-                command="python",
-                args=[str(math_server_path)],
-            )
+            # Process the request - format as list of HumanMessage objects
+            messages = {"messages": [HumanMessage(content=request)]}
+            config = {"configurable": {"thread_id": thread_id}} if thread_id else None
+            agent = self.agent
+            try:
+                response = await self._graph_for(thread_id).ainvoke(messages, config)
+            except self.SESSION_CLOSED_ERRORS:
+                # The MCP server died; reconnect once before giving up
+                await self._reconnect(agent)
+                response = await self._graph_for(thread_id).ainvoke(messages, config)
+            self._reconnect_failures = 0
             
-            async with stdio_client(server_params) as (read, write):
-                async with ClientSession(read, write) as session:
-                    await session.initialize()
-                    
-                    # Load MCP tools
-                    tools = await load_mcp_tools(session)
-                    
-                    # Create agent with MCP tools
-                    agent = create_react_agent(self.model, tools)
-                    
-                    # Process the request - format as list of HumanMessage objects
-                    response = await agent.ainvoke({"messages": [HumanMessage(content=request)]})
-                    
-                    # Extract the final message content
-                    if "messages" in response:
-                        messages = response["messages"]
-                        if messages and hasattr(messages[-1], 'content'):
-                            return messages[-1].content
-                        elif messages:
-                            return str(messages[-1])
-                    
-                    return str(response)
+            # Extract the final message content
+            result = str(response)
+            if "messages" in response:
+                messages = response["messages"]
+                if messages and hasattr(messages[-1], 'content'):
+                    result = messages[-1].content
+                elif messages:
+                    result = str(messages[-1])
                     
         except Exception as e:
             return f"Error processing mathematical request: {str(e)}"
+        
+        return result
+    
+    async def aclose(self):
+        """Close the MCP session and stop the math server"""
+        task, stop = self._session_task, self._session_stop
+        self._session_task = None
+        self._session_stop = None
+        self._session = None
+        self._tools = []
+        self.agent = None
+        self._threaded_agent = None
+        if task is not None:
+            # The owning task exits the session; it reports its own errors
+            stop.set()
+            await asyncio.wait([task])
     
     def get_capabilities(self) -> List[str]:
         """Return list of mathematical capabilities"""
@@ -118,16 +219,18 @@ class MathAgent:
             "Mathematical function plotting and visualization"
         ]
 
-# Global agent instance
-math_agent = MathAgent()
+@functools.lru_cache(maxsize=1)
+def get_math_agent() -> MathAgent:
+    """Get the shared agent instance, created on first use"""
+    return MathAgent()
 
 async def process_math_request(request: str) -> str:
     """Process a mathematical request"""
-    return await math_agent.process_request(request)
+    return await get_math_agent().process_request(request)
 
 def get_math_capabilities() -> List[str]:
     """Get mathematical capabilities"""
-    return math_agent.get_capabilities()
+    return get_math_agent().get_capabilities()
 
 # Test function
 async def test_agent():
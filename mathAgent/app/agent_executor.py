@@ -18,7 +18,7 @@ from a2a.utils import (
 )
 from a2a.utils.errors import ServerError
 
-from app.agent import process_math_request
+from app.agent import MathAgent, get_math_agent
 
 
 logging.basicConfig(level=logging.INFO)
@@ -27,8 +27,8 @@ logger = logging.getLogger(__name__)
 class MathAgentExecutor(AgentExecutor):
     """Math Agent Executor for A2A SDK integration"""
 
-    def __init__(self):
-        pass  # No need to initialize agent since we use the global function
+    def __init__(self, agent: MathAgent | None = None):
+        self.agent = agent or get_math_agent()
 
     async def execute(
         self,
@@ -50,8 +50,8 @@ class MathAgentExecutor(AgentExecutor):
         updater = TaskUpdater(event_queue, task.id, task.context_id)
         
         try:
-            # Process the mathematical request
-            result = await process_math_request(query)
+            # Process the mathematical request, keeping memory per A2A context
+            result = await self.agent.process_request(query, thread_id=task.context_id)
             
             # Add the result as an artifact and complete the task
             await updater.add_artifact(
@@ -2,43 +2,58 @@
 """
 Orchestrator Agent main application with A2A SDK integration and FastAPI endpoints
 """
+import asyncio
 import logging
 import os
 import sys
+from functools import lru_cache
 from pathlib import Path
 
 import argparse
-import httpx
+import orjson
 import uvicorn
 from dotenv import load_dotenv
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from starlette.applications import Starlette
 from starlette.middleware import Middleware
 from starlette.middleware.cors import CORSMiddleware
-from starlette.routing import Mount
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.responses import Response
+from starlette.routing import Mount, Route
 from a2a.server.apps import A2AStarletteApplication
 from a2a.server.request_handlers import DefaultRequestHandler
 from a2a.server.tasks import InMemoryTaskStore
 from a2a.types import AgentCard, AgentSkill, AgentCapabilities
 from a2a.client import A2ACardResolver
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
 
 # Load environment variables from .env file in project root
 project_root = Path(__file__).parent.parent.parent
 load_dotenv(dotenv_path=project_root / ".env")
 
-# LangSmith tracing configuration
-os.environ.setdefault("LANGCHAIN_TRACING_V2", "true")
-os.environ.setdefault("LANGCHAIN_ENDPOINT", os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com"))
-os.environ.setdefault("LANGCHAIN_API_KEY", os.getenv("LANGSMITH_API_KEY", ""))
-os.environ.setdefault("LANGCHAIN_PROJECT", os.getenv("LANGSMITH_PROJECT", "03892bba-bf1e-4c69-82d9-1058208e56ae"))
+# LangSmith tracing, only enabled when a real key is configured
+if os.getenv("LANGSMITH_API_KEY"):
+    os.environ.setdefault("LANGCHAIN_TRACING_V2", "true")
+    os.environ.setdefault("LANGCHAIN_ENDPOINT", os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com"))
+    os.environ.setdefault("LANGCHAIN_API_KEY", os.environ["LANGSMITH_API_KEY"])
+    os.environ.setdefault("LANGCHAIN_PROJECT", os.getenv("LANGSMITH_PROJECT", "03892bba-bf1e-4c69-82d9-1058208e56ae"))
 
-from app.orchestrator import SmartOrchestrator
+from app.orchestrator import SmartOrchestrator, create_http_client
 from app.agent_management_api import router as agent_management_router, set_orchestrator
+from app.task_store import RedisTaskStore
 
-logging.basicConfig(level=logging.INFO)
+logging.basicConfig(
+    level=logging.INFO,
+    format="%(asctime)s %(levelname)s %(name)s %(message)s"
+)
 logger = logging.getLogger(__name__)
 
+# Seconds between background sweeps of expired conversation sessions
+SESSION_CLEANUP_INTERVAL = 900
 
+
+@lru_cache(maxsize=1)
 def create_orchestrator_agent_card(host: str, port: int) -> AgentCard:
     """Create the orchestrator agent card"""
     skills = [
@@ -87,7 +102,7 @@ def create_orchestrator_agent_card(host: str, port: int) -> AgentCard:
     ]
     
     capabilities = AgentCapabilities(
-        streaming=False,
+        streaming=True,
         stateTransitionHistory=False
     )
     
@@ -103,6 +118,22 @@ def create_orchestrator_agent_card(host: str, port: int) -> AgentCard:
     )
 
 
+# Constant management API bodies, encoded once instead of on every call
+ROOT_RESPONSE = orjson.dumps({
+    "message": "Orchestrator Agent Management API",
+    "version": "1.0.0",
+    "endpoints": {
+        "docs": "/docs",
+        "register_agent": "/api/v1/agents/register",
+        "unregister_agent": "/api/v1/agents/unregister",
+        "list_agents": "/api/v1/agents/list",
+        "query": "/api/v1/agents/query",
+        "health": "/api/v1/agents/health"
+    }
+})
+HEALTH_RESPONSE = orjson.dumps({"status": "ok", "message": "Orchestrator is running"})
+
+
 def create_fastapi_app(orchestrator: SmartOrchestrator) -> FastAPI:
     """Create FastAPI application with agent management endpoints"""
     # Set the orchestrator instance for the API endpoints
@@ -114,20 +145,17 @@ def create_fastapi_app(orchestrator: SmartOrchestrator) -> FastAPI:
         description="API endpoints for managing agents in the orchestrator",
         version="1.0.0",
         docs_url="/docs",
-        redoc_url="/redoc"
+        redoc_url="/redoc",
+        # Agent lists and cards are serialized with orjson instead of json.dumps
+        default_response_class=ORJSONResponse
     )
     
     # Add global exception handler
     @fastapi_app.exception_handler(Exception)
     async def global_exception_handler(request, exc):
-        import traceback
-        error_trace = traceback.format_exc()
-        logger.error(f"Unhandled exception: {exc}", exc_info=True)
-        logger.error(f"Full traceback: {error_trace}")
-        print(f"ERROR: UNHANDLED EXCEPTION: {exc}")
-        print(f"Traceback:\n{error_trace}")
-        from fastapi.responses import JSONResponse
-        return JSONResponse(
+        # The traceback is only formatted if a handler emits the record
+        logger.error("Unhandled exception: %s", exc, exc_info=exc)
+        return ORJSONResponse(
             status_code=500,
             content={
                 "success": False,
@@ -136,14 +164,11 @@ def create_fastapi_app(orchestrator: SmartOrchestrator) -> FastAPI:
             }
         )
     
-    # Add CORS middleware
-    fastapi_app.add_middleware(
-        CORSMiddleware,
-        allow_origins=["*"],
-        allow_credentials=True,
-        allow_methods=["*"],
-        allow_headers=["*"],
-    )
+    # Compress larger management responses such as agent lists; level 1
+    # trades a little ratio for much less CPU. GZipMiddleware leaves
+    # text/event-stream responses uncompressed (locked starlette 0.47.2), so
+    # /query/stream events are still flushed one by one
+    fastapi_app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=1)
     
     # Include the agent management router
     fastapi_app.include_router(agent_management_router)
@@ -151,40 +176,76 @@ def create_fastapi_app(orchestrator: SmartOrchestrator) -> FastAPI:
     # Add a root endpoint
     @fastapi_app.get("/")
     async def root():
-        return {
-            "message": "Orchestrator Agent Management API",
-            "version": "1.0.0",
-            "endpoints": {
-                "docs": "/docs",
-                "register_agent": "/api/v1/agents/register",
-                "unregister_agent": "/api/v1/agents/unregister", 
-                "list_agents": "/api/v1/agents/list",
-                "query": "/api/v1/agents/query",
-                "health": "/api/v1/agents/health"
-            }
-        }
+        return Response(ROOT_RESPONSE, media_type="application/json")
     
     # Add health check endpoint at the FastAPI app level
     @fastapi_app.get("/api/v1/agents/health")
     async def health_check():
         """Health check endpoint"""
-        return {"status": "ok", "message": "Orchestrator is running"}
+        return Response(HEALTH_RESPONSE, media_type="application/json")
     
     return fastapi_app
 
 
-def create_combined_app(host: str, port: int, orchestrator: SmartOrchestrator) -> Starlette:
+async def enable_asyncio_debug():
+    """Log callbacks that block the event loop for more than 100 ms (dev only)"""
+    if os.getenv("ASYNCIO_DEBUG", "").lower() not in ("1", "true", "yes"):
+        return
+    
+    loop = asyncio.get_running_loop()
+    loop.set_debug(True)
+    loop.slow_callback_duration = 0.1
+    logging.getLogger("asyncio").setLevel(logging.WARNING)
+    logger.info("asyncio debug mode enabled, slow callback threshold 100 ms")
+
+
+def create_combined_app(host: str, port: int, orchestrator: SmartOrchestrator, agent_card: AgentCard) -> Starlette:
     """Create a combined Starlette app that includes both A2A and FastAPI"""
     from app.agent_executor import OrchestratorAgentExecutor
     
-    # Create the agent card
-    agent_card = create_orchestrator_agent_card(host, port)
+    # The card never changes, so discovery fetches get pre-encoded bytes
+    card_bytes = orjson.dumps(agent_card.model_dump(mode="json", exclude_none=True, by_alias=True))
+    
+    async def get_agent_card(request):
+        return Response(card_bytes, media_type="application/json")
+    
+    # Create the A2A server on the same orchestrator as the management API
+    agent_executor = OrchestratorAgentExecutor(orchestrator)
+    
+    async def open_http_client():
+        """Create the pooled client for downstream agents once the server starts"""
+        httpx_client = create_http_client()
+        orchestrator.httpx_client = httpx_client
+        combined_app.state.httpx_client = httpx_client
+    
+    async def session_cleanup_loop():
+        """Drop expired conversation sessions periodically"""
+        while True:
+            await asyncio.sleep(SESSION_CLEANUP_INTERVAL)
+            removed = orchestrator.cleanup_expired_sessions()
+            if removed:
+                logger.info(f"Removed {removed} expired conversation sessions")
+    
+    async def start_session_cleanup():
+        """Run session cleanup in the background instead of on the request path"""
+        combined_app.state.session_cleanup = asyncio.create_task(session_cleanup_loop())
+    
+    async def stop_session_cleanup():
+        """Stop the background session cleanup"""
+        combined_app.state.session_cleanup.cancel()
+    
+    # Share tasks through Redis when configured so any process can serve polls
+    redis_url = os.getenv("REDIS_URL")
+    task_store = RedisTaskStore(redis_url) if redis_url else InMemoryTaskStore()
+    # The client is opened on startup and closed on shutdown, so connections
+    # to downstream agents are reused for the whole server lifetime
+    shutdown_handlers = [stop_session_cleanup, orchestrator.aclose]
+    if redis_url:
+        shutdown_handlers.append(task_store.aclose)
     
-    # Create the A2A server
-    httpx_client = httpx.AsyncClient()
     request_handler = DefaultRequestHandler(
-        agent_executor=OrchestratorAgentExecutor(),
-        task_store=InMemoryTaskStore(),
+        agent_executor=agent_executor,
+        task_store=task_store,
     )
     a2a_app = A2AStarletteApplication(
         agent_card=agent_card, 
@@ -194,17 +255,22 @@ def create_combined_app(host: str, port: int, orchestrator: SmartOrchestrator) -
     # Create FastAPI app
     fastapi_app = create_fastapi_app(orchestrator)
     
-    # Create the combined Starlette application
+    # Create the combined Starlette application; its CORS middleware covers
+    # both mounts, and browsers cache preflight responses for an hour
     middleware = [
-        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"])
+        Middleware(CORSMiddleware, allow_origins=["*"], allow_methods=["*"], allow_headers=["*"], max_age=3600)
     ]
     
     combined_app = Starlette(
         middleware=middleware,
         routes=[
+            Route(AGENT_CARD_WELL_KNOWN_PATH, get_agent_card, methods=["GET"]),
             Mount("/management", fastapi_app),  # Mount FastAPI under /management
             Mount("/", a2a_app.build()),       # Mount A2A app at root
-        ]
+        ],
+        # Default agents are loaded on the server loop, over the pooled client
+        on_startup=[enable_asyncio_debug, open_http_client, orchestrator.startup, start_session_cleanup],
+        on_shutdown=shutdown_handlers
     )
     
     return combined_app
@@ -234,31 +300,32 @@ def main():
         # Create orchestrator instance
         logger.info("Initializing SmartOrchestrator...")
         orchestrator = SmartOrchestrator()
-        logger.info(f"Orchestrator initialized with {len(orchestrator.agents)} agents: {list(orchestrator.agents.keys())}")
-        
-        # Create the combined application
-        app = create_combined_app(host, port, orchestrator)
         
+        # Build the agent card once for the app and the startup log
         agent_card = create_orchestrator_agent_card(host, port)
+        
+        # Create the combined application
+        app = create_combined_app(host, port, orchestrator, agent_card)
 
-        print(f"Starting Smart Orchestrator Agent on {host}:{port}")
-        print(f"Agent Name: {agent_card.name}")
-        print(f"Description: {agent_card.description}")
-        print(f"Skills: {', '.join([skill.name for skill in agent_card.skills])}")
-        print(f"Capabilities: Intelligent routing, Dynamic agent discovery, Semantic understanding")
-        print(f"Pluggable: New agents can be registered at runtime")
-        print()
-        print("FastAPI Management Endpoints:")
-        print(f"   API Documentation: http://{host}:{port}/management/docs")
-        print(f"   List Agents: http://{host}:{port}/management/api/v1/agents/list") 
-        print(f"   Register Agent: POST http://{host}:{port}/management/api/v1/agents/register")
-        print(f"   Unregister Agent: POST http://{host}:{port}/management/api/v1/agents/unregister")
-        print()
-        print("A2A Protocol Endpoints:")
-        print(f"   A2A Root: http://{host}:{port}/")
-        print(f"   Agent Card: http://{host}:{port}/agent-card")
+        base_url = f"http://{host}:{port}"
+        endpoints = {
+            "a2a_root": f"{base_url}/",
+            "agent_card": f"{base_url}{AGENT_CARD_WELL_KNOWN_PATH}",
+            "docs": f"{base_url}/management/docs",
+            "list_agents": f"{base_url}/management/api/v1/agents/list",
+            "register_agent": f"{base_url}/management/api/v1/agents/register",
+            "unregister_agent": f"{base_url}/management/api/v1/agents/unregister",
+        }
+        logger.info(
+            "Starting %s on %s:%s with skills: %s; management API docs at %s",
+            agent_card.name, host, port,
+            ", ".join(skill.name for skill in agent_card.skills),
+            endpoints["docs"],
+            extra={"host": host, "port": port, "endpoints": endpoints}
+        )
 
-        uvicorn.run(app, host=host, port=port)
+        # Single worker: the agent registry is in-process
+        uvicorn.run(app, host=host, port=port, loop="uvloop", http="httptools")
 
     except Exception as e:
         logger.error(f'An error occurred during server startup: {e}')
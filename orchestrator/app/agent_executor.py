@@ -2,7 +2,8 @@
 Orchestrator Agent Executor
 """
 import logging
-import json
+
+import orjson
 
 from a2a.server.agent_execution import AgentExecutor, RequestContext
 from a2a.server.events import EventQueue
@@ -35,11 +36,18 @@ logger = logging.getLogger(__name__)
 
 class OrchestratorAgentExecutor(AgentExecutor):
     """Orchestrator Agent Executor for intelligent request routing"""
-    def __init__(self):
+    def __init__(self, orchestrator: SmartOrchestrator):
         logger.info("Initializing OrchestratorAgentExecutor...")
-        self.orchestrator = SmartOrchestrator()
+        # Shared with the management API so both paths see one agent registry
+        self.orchestrator = orchestrator
         logger.info(f"Orchestrator initialized with agents: {list(self.orchestrator.agents.keys())}")
         logger.info(f"Agent capabilities extracted: {len(self.orchestrator.agent_capabilities)}")
+        # Command prefixes and their handlers, looked up once per request
+        self._commands = {
+            "LIST_AGENTS": self._list_agents,
+            "REGISTER_AGENT:": self._register_agent,
+            "UNREGISTER_AGENT:": self._unregister_agent,
+        }
     
     async def execute(
         self,
@@ -64,179 +72,13 @@ class OrchestratorAgentExecutor(AgentExecutor):
         updater = TaskUpdater(event_queue, task.id, task.context_id)
         
         try:
-            # Check if this is a list agents request
-            if query.strip() == "LIST_AGENTS":
-                logger.info("Listing available agents")
-                
-                await updater.update_status(
-                    TaskState.working,
-                    new_agent_text_message(
-                        "Retrieving available agents...",
-                        task.context_id,
-                        task.id,
-                    ),
-                )
-                
-                # Get available agents
-                agents = self.orchestrator.get_available_agents()
-                logger.info(f"Available agents: {len(agents)}")
-                
-                # Format as JSON for the client
-                response_text = json.dumps({
-                    "type": "agent_list",
-                    "agents": agents,
-                    "total_count": len(agents)
-                }, indent=2)
-            
-            # Check if this is a registration request
-            elif query.startswith("REGISTER_AGENT:"):
-                endpoint = query.replace("REGISTER_AGENT:", "").strip()
-                logger.info(f"Registering agent from endpoint: {endpoint}")
-                
-                await updater.update_status(
-                    TaskState.working,
-                    new_agent_text_message(
-                        f"Registering agent from {endpoint}...",
-                        task.context_id,
-                        task.id,
-                    ),
-                )
-                
-                # Register the agent
-                result = await self.orchestrator.register_agent(endpoint)
-                logger.info(f"Registration result: {result}")
-                
-                if result.get("success", False):
-                    # Log all registered agent details after successful registration
-                    logger.info("=" * 80)
-                    logger.info("AGENT REGISTRATION SUCCESSFUL - ALL REGISTERED AGENTS:")
-                    logger.info("=" * 80)
-                    
-                    for agent_id, agent_card in self.orchestrator.agents.items():
-                        logger.info(f"Agent ID: {agent_id}")
-                        logger.info(f"  Name: {agent_card.name}")
-                        logger.info(f"  Endpoint: {agent_card.url}")
-                        logger.info(f"  Description: {agent_card.description}")
-                        
-                        # Log skills if available
-                        if agent_card.skills:
-                            logger.info(f"  Skills ({len(agent_card.skills)}):")
-                            for skill in agent_card.skills:
-                                logger.info(f"    • {skill.name}: {skill.description}")
-                                if skill.tags:
-                                    logger.info(f"      Tags: {', '.join(skill.tags)}")
-                        else:
-                            logger.info("  Skills: None")
-                        
-                        # Log capabilities if available
-                        capabilities = agent_card.capabilities
-                        logger.info(f"  Capabilities:")
-                        logger.info(f"    • Streaming: {capabilities.streaming}")
-                        logger.info(f"    • State Transition History: {getattr(capabilities, 'state_transition_history', False)}")
-                        
-                        logger.info("-" * 40)
-                    
-                    # Log extracted capabilities
-                    if agent_id in self.orchestrator.agent_capabilities:
-                        agent_cap = self.orchestrator.agent_capabilities[agent_id]
-                        logger.info(f"  Extracted Capabilities:")
-                        logger.info(f"    • Domains: {', '.join(agent_cap['domains'])}")
-                        logger.info(f"    • Keywords: {', '.join(agent_cap['keywords'])}")
-                        if agent_cap['examples']:
-                            logger.info(f"    • Examples: {len(agent_cap['examples'])} examples")
-                    
-                    logger.info(f"Total registered agents: {len(self.orchestrator.agents)}")
-                    logger.info("=" * 80)
-                    
-                    response_text = f"SUCCESS: {result.get('message')}\n"
-                    response_text += f"Agent ID: {result.get('agent_id')}\n"
-                    response_text += f"Agent Name: {result.get('agent_name')}\n"
-                    response_text += f"Total agents: {len(self.orchestrator.agents)}"
-                else:
-                    response_text = f"ERROR: Registration failed: {result.get('error')}"
-            
-            # Check if this is an unregistration request
-            elif query.startswith("UNREGISTER_AGENT:"):
-                agent_identifier = query.replace("UNREGISTER_AGENT:", "").strip()
-                logger.info(f"Unregistering agent: {agent_identifier}")
-                
-                await updater.update_status(
-                    TaskState.working,
-                    new_agent_text_message(
-                        f"Unregistering agent {agent_identifier}...",
-                        task.context_id,
-                        task.id,
-                    ),
-                )
-                
-                # Unregister the agent
-                result = await self.orchestrator.unregister_agent(agent_identifier)
-                logger.info(f"Unregistration result: {result}")
-                
-                if result.get("success", False):
-                    # Log all registered agent details after successful unregistration
-                    logger.info("=" * 80)
-                    logger.info("AGENT UNREGISTRATION SUCCESSFUL - REMAINING REGISTERED AGENTS:")
-                    logger.info("=" * 80)
-                    
-                    if self.orchestrator.agents:
-                        for agent_id, agent_card in self.orchestrator.agents.items():
-                            logger.info(f"Agent ID: {agent_id}")
-                            logger.info(f"  Name: {agent_card.name}")
-                            logger.info(f"  Endpoint: {agent_card.url}")
-                            logger.info(f"  Description: {agent_card.description}")
-                            logger.info("-" * 40)
-                    else:
-                        logger.info("No agents remaining in registry")
-                    
-                    logger.info(f"Total remaining agents: {len(self.orchestrator.agents)}")
-                    logger.info("=" * 80)
-                    
-                    response_text = f"SUCCESS: {result.get('message')}\n"
-                    response_text += f"Agent ID: {result.get('agent_id')}\n"
-                    response_text += f"Remaining agents: {len(self.orchestrator.agents)}"
-                else:
-                    response_text = f"ERROR: Unregistration failed: {result.get('error')}"
-                
+            # Commands are "NAME" or "NAME:<argument>"; anything else is routed
+            command, separator, argument = query.strip().partition(":")
+            handler = self._commands.get(command + separator)
+            if handler is not None:
+                response_text = await handler(argument.strip(), task, updater)
             else:
-                # Process the request through the orchestrator
-                await updater.update_status(
-                    TaskState.working,
-                    new_agent_text_message(
-                        "Analyzing request and selecting the best agent...",
-                        task.context_id,
-                        task.id,
-                    ),
-                )
-                
-                result = await self.orchestrator.process_request(query, session_id=task.context_id)
-                logger.info(f"Orchestrator result: {result}")
-                
-                # Update task status with routing decision
-                await updater.update_status(
-                    TaskState.working,
-                    new_agent_text_message(
-                        f"Routing decision: {result.get('selected_agent_name', 'No agent')} " +
-                        f"(confidence: {result.get('confidence', 0):.2f})",
-                        task.context_id,
-                        task.id,
-                    ),
-                )
-                
-                # Format the response
-                if result.get("success", False):
-                    if result.get("selected_agent_id"):
-                        response_text = f"Routed to {result.get('selected_agent_name', 'Unknown Agent')}\n"
-                        response_text += f"Confidence: {result.get('confidence', 0):.2f}\n"
-                        response_text += f"Reasoning: {result.get('reasoning', 'No reasoning provided')}\n"
-                        response_text += f"Response: {result.get('response', 'No response')}"
-                    else:
-                        response_text = f"WARNING: No suitable agent found for this request\n"
-                        response_text += f"Reason: {result.get('reasoning', 'No reasoning provided')}\n"
-                        response_text += f"Available agents: {', '.join([a['name'] for a in self.orchestrator.get_available_agents()])}"
-                else:
-                    response_text = f"ERROR: {result.get('error', 'Unknown error')}"
-                    logger.error(f"Orchestrator error: {result.get('error', 'Unknown error')}")
+                response_text = await self._process_query(query, task, updater)
             
             # Complete the task
             await updater.add_artifact(
@@ -249,6 +91,214 @@ class OrchestratorAgentExecutor(AgentExecutor):
             logger.error(f'An error occurred while processing orchestrator request: {e}')
             raise ServerError(error=InternalError()) from e
 
+    async def _list_agents(self, argument: str, task: Task, updater: TaskUpdater) -> str:
+        """Handle LIST_AGENTS"""
+        logger.info("Listing available agents")
+        
+        await updater.update_status(
+            TaskState.working,
+            new_agent_text_message(
+                "Retrieving available agents...",
+                task.context_id,
+                task.id,
+            ),
+        )
+        
+        # Get available agents
+        agents = self.orchestrator.get_available_agents()
+        logger.info(f"Available agents: {len(agents)}")
+        
+        # Format as compact JSON for the client
+        response_text = orjson.dumps({
+            "type": "agent_list",
+            "agents": agents,
+            "total_count": len(agents)
+        }).decode()
+        
+        return response_text
+
+    async def _register_agent(self, endpoint: str, task: Task, updater: TaskUpdater) -> str:
+        """Handle REGISTER_AGENT:<agent_url>"""
+        logger.info(f"Registering agent from endpoint: {endpoint}")
+        
+        await updater.update_status(
+            TaskState.working,
+            new_agent_text_message(
+                f"Registering agent from {endpoint}...",
+                task.context_id,
+                task.id,
+            ),
+        )
+        
+        # Register the agent
+        result = await self.orchestrator.register_agent(endpoint)
+        logger.debug("Registration result: %s", result)
+        
+        if result.get("success", False):
+            # One structured record per registration
+            logger.info(
+                "Agent registration successful: %s (%d agents registered)",
+                result.get("agent_name"), len(self.orchestrator.agents),
+                extra={
+                    "agent_id": result.get("agent_id"),
+                    "agents": list(self.orchestrator.agents),
+                    "total": len(self.orchestrator.agents),
+                }
+            )
+        
+        # Dump all registered agent details only when debugging
+        if result.get("success", False) and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=" * 80)
+            logger.debug("AGENT REGISTRATION SUCCESSFUL - ALL REGISTERED AGENTS:")
+            logger.debug("=" * 80)
+            
+            for agent_id, agent_card in self.orchestrator.agents.items():
+                logger.debug("Agent ID: %s", agent_id)
+                logger.debug("  Name: %s", agent_card.name)
+                logger.debug("  Endpoint: %s", agent_card.url)
+                logger.debug("  Description: %s", agent_card.description)
+                
+                # Log skills and their tags in one record
+                skills = ", ".join(
+                    f"{skill.name}({','.join(skill.tags or ())})" for skill in agent_card.skills
+                )
+                logger.debug("  Skills (%d): %s", len(agent_card.skills), skills or "None")
+                
+                # Log capabilities if available
+                capabilities = agent_card.capabilities
+                logger.debug(
+                    "  Capabilities: streaming=%s, state_transition_history=%s",
+                    capabilities.streaming,
+                    getattr(capabilities, 'state_transition_history', False)
+                )
+                
+                logger.debug("-" * 40)
+            
+            # Log extracted capabilities
+            if agent_id in self.orchestrator.agent_capabilities:
+                agent_cap = self.orchestrator.agent_capabilities[agent_id]
+                logger.debug("  Extracted Capabilities:")
+                logger.debug("    • Domains: %s", ", ".join(agent_cap['domains']))
+                logger.debug("    • Keywords: %s", ", ".join(agent_cap['keywords']))
+                if agent_cap['examples']:
+                    logger.debug("    • Examples: %d examples", len(agent_cap['examples']))
+            
+            logger.debug("Total registered agents: %d", len(self.orchestrator.agents))
+            logger.debug("=" * 80)
+        
+        if result.get("success", False):
+            response_text = f"SUCCESS: {result.get('message')}\n"
+            response_text += f"Agent ID: {result.get('agent_id')}\n"
+            response_text += f"Agent Name: {result.get('agent_name')}\n"
+            response_text += f"Total agents: {len(self.orchestrator.agents)}"
+        else:
+            response_text = f"ERROR: Registration failed: {result.get('error')}"
+        
+        return response_text
+
+    async def _unregister_agent(self, agent_identifier: str, task: Task, updater: TaskUpdater) -> str:
+        """Handle UNREGISTER_AGENT:<agent_id>"""
+        logger.info(f"Unregistering agent: {agent_identifier}")
+        
+        await updater.update_status(
+            TaskState.working,
+            new_agent_text_message(
+                f"Unregistering agent {agent_identifier}...",
+                task.context_id,
+                task.id,
+            ),
+        )
+        
+        # Unregister the agent
+        result = await self.orchestrator.unregister_agent(agent_identifier)
+        logger.debug("Unregistration result: %s", result)
+        
+        if result.get("success", False):
+            # One structured record per unregistration
+            logger.info(
+                "Agent unregistration successful: %s (%d agents remaining)",
+                result.get("agent_name"), len(self.orchestrator.agents),
+                extra={
+                    "agent_id": result.get("agent_id"),
+                    "agents": list(self.orchestrator.agents),
+                    "total": len(self.orchestrator.agents),
+                }
+            )
+        
+        # Dump the remaining agents only when debugging
+        if result.get("success", False) and logger.isEnabledFor(logging.DEBUG):
+            logger.debug("=" * 80)
+            logger.debug("AGENT UNREGISTRATION SUCCESSFUL - REMAINING REGISTERED AGENTS:")
+            logger.debug("=" * 80)
+            
+            if self.orchestrator.agents:
+                for agent_id, agent_card in self.orchestrator.agents.items():
+                    logger.debug("Agent ID: %s", agent_id)
+                    logger.debug("  Name: %s", agent_card.name)
+                    logger.debug("  Endpoint: %s", agent_card.url)
+                    logger.debug("  Description: %s", agent_card.description)
+                    logger.debug("-" * 40)
+            else:
+                logger.debug("No agents remaining in registry")
+            
+            logger.debug("Total remaining agents: %d", len(self.orchestrator.agents))
+            logger.debug("=" * 80)
+        
+        if result.get("success", False):
+            response_text = f"SUCCESS: {result.get('message')}\n"
+            response_text += f"Agent ID: {result.get('agent_id')}\n"
+            response_text += f"Remaining agents: {len(self.orchestrator.agents)}"
+        else:
+            response_text = f"ERROR: Unregistration failed: {result.get('error')}"
+        
+        return response_text
+
+    async def _process_query(self, query: str, task: Task, updater: TaskUpdater) -> str:
+        """Route any other request through the orchestrator"""
+        # No status before routing: it finishes in this handler, and the
+        # routing decision update below is the first one worth sending
+        async def relay_progress(text: str) -> None:
+            # Pass downstream status updates on as they arrive
+            await updater.update_status(
+                TaskState.working,
+                new_agent_text_message(text, task.context_id, task.id),
+            )
+        
+        result = await self.orchestrator.process_request(
+            query,
+            session_id=task.context_id,
+            on_progress=relay_progress
+        )
+        logger.info(f"Orchestrator result: {result}")
+        
+        # Update task status with routing decision
+        await updater.update_status(
+            TaskState.working,
+            new_agent_text_message(
+                f"Routing decision: {result.get('selected_agent_name', 'No agent')} " +
+                f"(confidence: {result.get('confidence', 0):.2f})",
+                task.context_id,
+                task.id,
+            ),
+        )
+        
+        # Format the response
+        if result.get("success", False):
+            if result.get("selected_agent_id"):
+                response_text = f"Routed to {result.get('selected_agent_name', 'Unknown Agent')}\n"
+                response_text += f"Confidence: {result.get('confidence', 0):.2f}\n"
+                response_text += f"Reasoning: {result.get('reasoning', 'No reasoning provided')}\n"
+                response_text += f"Response: {result.get('response', 'No response')}"
+            else:
+                response_text = f"WARNING: No suitable agent found for this request\n"
+                response_text += f"Reason: {result.get('reasoning', 'No reasoning provided')}\n"
+                response_text += f"Available agents: {', '.join(result.get('available_agent_names', ()))}"
+        else:
+            response_text = f"ERROR: {result.get('error', 'Unknown error')}"
+            logger.error(f"Orchestrator error: {result.get('error', 'Unknown error')}")
+        
+        return response_text
+
     def _validate_request(self, context: RequestContext) -> bool:
         return False
 
@@ -3,19 +3,16 @@
 FastAPI endpoints for agent management operations
 """
 import logging
-import json
-from typing import Dict, List, Optional, AsyncGenerator
-from fastapi import APIRouter, HTTPException, Depends
-from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional, AsyncGenerator, Tuple
+import orjson
+from fastapi import APIRouter, Body, HTTPException, Depends
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
 from pydantic import BaseModel, Field
 from app.orchestrator import SmartOrchestrator
 
 logger = logging.getLogger(__name__)
 
 # Pydantic models for request/response
-class RegisterAgentRequest(BaseModel):
-    endpoint: str = Field(..., description="The endpoint URL of the agent to register")
-
 class RegisterAgentResponse(BaseModel):
     success: bool
     agent_id: Optional[str] = None
@@ -24,9 +21,6 @@ class RegisterAgentResponse(BaseModel):
     message: str
     error: Optional[str] = None
 
-class UnregisterAgentRequest(BaseModel):
-    agent_identifier: str = Field(..., description="Agent ID, name, or endpoint to unregister")
-
 class UnregisterAgentResponse(BaseModel):
     success: bool
     agent_id: Optional[str] = None
@@ -78,13 +72,36 @@ def set_orchestrator(orchestrator: SmartOrchestrator):
     """Set the orchestrator instance"""
     global _orchestrator_instance
     _orchestrator_instance = orchestrator
+    invalidate_list_cache()
+
+# Encoded /list response as (registry version, body). The orchestrator bumps
+# its registry version on every change, whether it came through this API or
+# the A2A commands, so a stale body is never served
+_list_cache: Optional[Tuple[int, bytes]] = None
+
+def invalidate_list_cache():
+    """Drop the cached /list response"""
+    global _list_cache
+    _list_cache = None
+
+# Create FastAPI router; responses are encoded with orjson and leave out
+# optional fields that are not set
+router = APIRouter(
+    prefix="/api/v1/agents",
+    tags=["Agent Management"],
+    default_response_class=ORJSONResponse
+)
 
-# Create FastAPI router
-router = APIRouter(prefix="/api/v1/agents", tags=["Agent Management"])
+def _json_response(**fields) -> ORJSONResponse:
+    """Encode a response dict directly, leaving out fields that are not set"""
+    return ORJSONResponse({key: value for key, value in fields.items() if value is not None})
 
-@router.post("/register", response_model=RegisterAgentResponse)
+# The handlers below return ORJSONResponse directly, skipping outbound model
+# validation and jsonable_encoder; response_model is kept for the OpenAPI schema
+@router.post("/register", response_model=RegisterAgentResponse, response_model_exclude_none=True)
 async def register_agent(
-    request: RegisterAgentRequest,
+    # Single string read from {"endpoint": ...} without a request model
+    endpoint: str = Body(..., embed=True, description="The endpoint URL of the agent to register"),
     orchestrator: SmartOrchestrator = Depends(get_orchestrator)
 ):
     """
@@ -92,13 +109,13 @@ async def register_agent(
     The orchestrator will fetch the agent's card and add it to the registry.
     """
     try:
-        logger.info(f"Registering agent from endpoint: {request.endpoint}")
+        logger.info(f"Registering agent from endpoint: {endpoint}")
         
-        result = await orchestrator.register_agent(request.endpoint)
+        result = await orchestrator.register_agent(endpoint)
         
         if result["success"]:
             logger.info(f"Successfully registered agent: {result.get('agent_name', 'Unknown')}")
-            return RegisterAgentResponse(
+            return _json_response(
                 success=True,
                 agent_id=result.get("agent_id"),
                 agent_name=result.get("agent_name"),
@@ -106,24 +123,25 @@ async def register_agent(
                 message=result.get("message", "Agent registered successfully")
             )
         else:
-            logger.warning(f"Failed to register agent from {request.endpoint}: {result.get('error')}")
-            return RegisterAgentResponse(
+            logger.warning(f"Failed to register agent from {endpoint}: {result.get('error')}")
+            return _json_response(
                 success=False,
                 message="Failed to register agent",
                 error=result.get("error")
             )
             
     except Exception as e:
-        logger.error(f"Error registering agent from {request.endpoint}: {e}")
-        return RegisterAgentResponse(
+        logger.error(f"Error registering agent from {endpoint}: {e}")
+        return _json_response(
             success=False,
             message="Internal server error during agent registration",
             error=str(e)
         )
 
-@router.post("/unregister", response_model=UnregisterAgentResponse)
+@router.post("/unregister", response_model=UnregisterAgentResponse, response_model_exclude_none=True)
 async def unregister_agent(
-    request: UnregisterAgentRequest,
+    # Single string read from {"agent_identifier": ...} without a request model
+    agent_identifier: str = Body(..., embed=True, description="Agent ID, name, or endpoint to unregister"),
     orchestrator: SmartOrchestrator = Depends(get_orchestrator)
 ):
     """
@@ -131,13 +149,13 @@ async def unregister_agent(
     The agent will be removed from the registry.
     """
     try:
-        logger.info(f"Unregistering agent: {request.agent_identifier}")
+        logger.info(f"Unregistering agent: {agent_identifier}")
         
-        result = await orchestrator.unregister_agent(request.agent_identifier)
+        result = await orchestrator.unregister_agent(agent_identifier)
         
         if result["success"]:
             logger.info(f"Successfully unregistered agent: {result.get('agent_name', 'Unknown')}")
-            return UnregisterAgentResponse(
+            return _json_response(
                 success=True,
                 agent_id=result.get("agent_id"),
                 agent_name=result.get("agent_name"),
@@ -145,54 +163,53 @@ async def unregister_agent(
                 message=result.get("message", "Agent unregistered successfully")
             )
         else:
-            logger.warning(f"Failed to unregister agent {request.agent_identifier}: {result.get('error')}")
-            return UnregisterAgentResponse(
+            logger.warning(f"Failed to unregister agent {agent_identifier}: {result.get('error')}")
+            return _json_response(
                 success=False,
                 message="Failed to unregister agent",
                 error=result.get("error")
             )
             
     except Exception as e:
-        logger.error(f"Error unregistering agent {request.agent_identifier}: {e}")
-        return UnregisterAgentResponse(
+        logger.error(f"Error unregistering agent {agent_identifier}: {e}")
+        return _json_response(
             success=False,
             message="Internal server error during agent unregistration",
             error=str(e)
         )
 
-@router.get("/list", response_model=ListAgentsResponse)
+# Documented through responses= rather than response_model=, since the
+# handler always returns pre-encoded bytes and never a model
+@router.get("/list", responses={200: {"model": ListAgentsResponse}})
 async def list_agents(
     orchestrator: SmartOrchestrator = Depends(get_orchestrator)
 ):
     """
     List all registered agents with their details including skills and capabilities.
     """
+    global _list_cache
     try:
-        logger.info("Listing all registered agents")
+        # Serve the encoded response until the registry changes
+        registry_version = orchestrator.registry_version
+        if _list_cache is not None and _list_cache[0] == registry_version:
+            return Response(_list_cache[1], media_type="application/json")
         
-        agents_data = orchestrator.get_available_agents()
+        logger.info("Listing all registered agents")
         
-        agents = [
-            AgentInfo(
-                agent_id=agent["agent_id"],
-                name=agent["name"],
-                description=agent["description"],
-                endpoint=agent["endpoint"],
-                skills=agent["skills"],
-                keywords=agent["keywords"],
-                capabilities=agent["capabilities"]
-            )
-            for agent in agents_data
-        ]
+        agents = orchestrator.get_available_agents()
         
         logger.info(f"Found {len(agents)} registered agents")
         
-        return ListAgentsResponse(
-            success=True,
-            agents=agents,
-            total_count=len(agents),
-            message=f"Found {len(agents)} registered agents"
-        )
+        # The dicts already match AgentInfo, so they are encoded directly
+        # instead of being validated into models and re-serialized
+        body = orjson.dumps({
+            "success": True,
+            "agents": agents,
+            "total_count": len(agents),
+            "message": f"Found {len(agents)} registered agents"
+        })
+        _list_cache = (registry_version, body)
+        return Response(body, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Error listing agents: {e}")
@@ -211,8 +228,7 @@ async def register_agent_get(
     Alternative GET endpoint for registering an agent.
     Usage: GET /api/v1/agents/register_agent?endpoint=http://localhost:8001
     """
-    request = RegisterAgentRequest(endpoint=endpoint)
-    return await register_agent(request, orchestrator)
+    return await register_agent(endpoint, orchestrator)
 
 @router.get("/unregister_agent")
 async def unregister_agent_get(
@@ -223,20 +239,13 @@ async def unregister_agent_get(
     Alternative GET endpoint for unregistering an agent.
     Usage: GET /api/v1/agents/unregister_agent?agent_identifier=MathAgent
     """
-    request = UnregisterAgentRequest(agent_identifier=agent_identifier)
-    return await unregister_agent(request, orchestrator)
+    return await unregister_agent(agent_identifier, orchestrator)
 
-@router.get("/list_agents")
-async def list_agents_get(
-    orchestrator: SmartOrchestrator = Depends(get_orchestrator)
-):
-    """
-    Alternative GET endpoint for listing agents.
-    Usage: GET /api/v1/agents/list_agents
-    """
-    return await list_agents(orchestrator)
+# Alternative GET endpoint for listing agents, served by the same handler
+# Usage: GET /api/v1/agents/list_agents
+router.add_api_route("/list_agents", list_agents, methods=["GET"], include_in_schema=False)
 
-@router.post("/query", response_model=QueryResponse)
+@router.post("/query", response_model=QueryResponse, response_model_exclude_none=True)
 async def process_query(
     request: QueryRequest,
     orchestrator: SmartOrchestrator = Depends(get_orchestrator)
@@ -245,21 +254,13 @@ async def process_query(
     Process a user query through the orchestrator.
     The orchestrator will route the query to the most appropriate agent.
     """
-    print(f"\n{'='*80}")
-    print(f"QUERY REQUEST RECEIVED")
-    print(f"{'='*80}")
-    print(f"Query: {request.query}")
-    print(f"Session ID: {request.session_id}")
-    print(f"Orchestrator agents: {list(orchestrator.agents.keys())}")
-    print(f"{'='*80}\n")
-    
     try:
-        logger.info(f"Processing query: {request.query[:100]}...")
-        print(f"Starting query processing...")
+        logger.info("Processing query: %s...", request.query[:100])
+        logger.debug("Query session: %s, agents: %s", request.session_id, list(orchestrator.agents))
         
         # Validate request
         if not request.query or not request.query.strip():
-            return QueryResponse(
+            return _json_response(
                 success=False,
                 response="",
                 selected_agent_id=None,
@@ -270,20 +271,16 @@ async def process_query(
                 error="Query cannot be empty"
             )
         
-        print(f"Calling orchestrator.process_request...")
         result = await orchestrator.process_request(
             request.query.strip(),
             session_id=request.session_id
         )
-        print(f"Received result from orchestrator: {type(result)}")
-        print(f"Result keys: {list(result.keys()) if isinstance(result, dict) else 'Not a dict'}")
         
         # Ensure result is a dict
         if not isinstance(result, dict):
             error_msg = f"Unexpected result type: {type(result)}, value: {result}"
             logger.error(error_msg)
-            print(f"ERROR: {error_msg}")
-            return QueryResponse(
+            return _json_response(
                 success=False,
                 response="",
                 selected_agent_id=None,
@@ -295,7 +292,7 @@ async def process_query(
             )
         
         if result.get("success", False):
-            return QueryResponse(
+            return _json_response(
                 success=True,
                 response=result.get("response", ""),
                 selected_agent_id=result.get("selected_agent_id"),
@@ -305,7 +302,7 @@ async def process_query(
                 session_id=result.get("session_id")
             )
         else:
-            return QueryResponse(
+            return _json_response(
                 success=False,
                 response="",
                 selected_agent_id=None,
@@ -317,25 +314,12 @@ async def process_query(
             )
             
     except Exception as e:
-        import traceback
-        error_trace = traceback.format_exc()
-        
-        # Print to console (will definitely show up)
-        print(f"\n{'='*80}")
-        print(f"ERROR: EXCEPTION IN QUERY ENDPOINT")
-        print(f"{'='*80}")
-        print(f"Error: {str(e)}")
-        print(f"Error type: {type(e).__name__}")
-        print(f"\nFull traceback:")
-        print(error_trace)
-        print(f"{'='*80}\n")
-        
-        logger.error(f"Error processing query: {e}", exc_info=True)
-        logger.error(f"Full traceback: {error_trace}")
+        # Logged once, with the traceback
+        logger.exception("Error processing query: %s", e)
         
         # Return proper error response
         try:
-            return QueryResponse(
+            return _json_response(
                 success=False,
                 response="",
                 selected_agent_id=None,
@@ -347,13 +331,26 @@ async def process_query(
             )
         except Exception as response_error:
             # If even creating the response fails, log and raise
-            print(f"CRITICAL ERROR: Failed to create error response: {response_error}")
             logger.error(f"Failed to create error response: {response_error}")
             raise HTTPException(
                 status_code=500,
                 detail=f"Internal server error: {str(e)}"
             )
 
+# Server-sent event framing for /query/stream; fixed events are encoded once
+# and response chunks only need their text escaped
+STREAM_CHUNK_SIZE = 50
+SSE_EVENT_END = b'}\n\n'
+CHUNK_EVENT_PREFIX = b'data: {"type":"chunk","content":'
+
+def _sse_event(payload: Dict) -> bytes:
+    """Frame a payload as one server-sent event"""
+    return b"data: " + orjson.dumps(payload) + b"\n\n"
+
+EMPTY_QUERY_EVENT = _sse_event({'type': 'error', 'error': 'Query cannot be empty'})
+PROCESSING_EVENT = _sse_event({'type': 'status', 'message': 'Processing query...'})
+DONE_EVENT = _sse_event({'type': 'done'})
+
 @router.post("/query/stream")
 async def process_query_stream(
     request: QueryRequest,
@@ -362,15 +359,15 @@ async def process_query_stream(
     """
     Process a user query through the orchestrator with streaming response.
     """
-    async def generate_stream() -> AsyncGenerator[str, None]:
+    async def generate_stream() -> AsyncGenerator[bytes, None]:
         try:
             # Validate request
             if not request.query or not request.query.strip():
-                yield f"data: {json.dumps({'type': 'error', 'error': 'Query cannot be empty'})}\n\n"
+                yield EMPTY_QUERY_EVENT
                 return
             
             # Send initial status
-            yield f"data: {json.dumps({'type': 'status', 'message': 'Processing query...'})}\n\n"
+            yield PROCESSING_EVENT
             
             # Process request
             result = await orchestrator.process_request(
@@ -383,27 +380,25 @@ async def process_query_stream(
                 if result.get("success", False):
                     # Stream metadata first
                     if result.get("selected_agent_name"):
-                        yield f"data: {json.dumps({'type': 'metadata', 'agent': result.get('selected_agent_name'), 'confidence': result.get('confidence'), 'reasoning': result.get('reasoning')})}\n\n"
+                        yield _sse_event({'type': 'metadata', 'agent': result.get('selected_agent_name'), 'confidence': result.get('confidence'), 'reasoning': result.get('reasoning')})
                     
                     # Stream response text in chunks
                     response_text = result.get("response", "")
                     if response_text:
-                        # Stream in chunks for better UX
-                        chunk_size = 50
-                        for i in range(0, len(response_text), chunk_size):
-                            chunk = response_text[i:i + chunk_size]
-                            yield f"data: {json.dumps({'type': 'chunk', 'content': chunk})}\n\n"
+                        for i in range(0, len(response_text), STREAM_CHUNK_SIZE):
+                            chunk = response_text[i:i + STREAM_CHUNK_SIZE]
+                            yield CHUNK_EVENT_PREFIX + orjson.dumps(chunk) + SSE_EVENT_END
                     
                     # Send completion
-                    yield f"data: {json.dumps({'type': 'done'})}\n\n"
+                    yield DONE_EVENT
                 else:
-                    yield f"data: {json.dumps({'type': 'error', 'error': result.get('error', 'Unknown error occurred')})}\n\n"
+                    yield _sse_event({'type': 'error', 'error': result.get('error', 'Unknown error occurred')})
             else:
-                yield f"data: {json.dumps({'type': 'error', 'error': f'Unexpected result type: {type(result)}'})}\n\n"
+                yield _sse_event({'type': 'error', 'error': f'Unexpected result type: {type(result)}'})
                 
         except Exception as e:
             logger.error(f"Error in streaming query: {e}", exc_info=True)
-            yield f"data: {json.dumps({'type': 'error', 'error': f'Internal server error: {str(e)}'})}\n\n"
+            yield _sse_event({'type': 'error', 'error': f'Internal server error: {str(e)}'})
     
     return StreamingResponse(
         generate_stream(),
@@ -6,13 +6,19 @@ Maintains conversation context across multiple agents to enable
 seamless multi-agent conversations with context continuity.
 """
 
+import string
 import time
 import uuid
-from dataclasses import dataclass, field
-from typing import Dict, List, Optional, Any
+from collections import Counter, deque
+from itertools import islice
+from dataclasses import asdict, dataclass, field
+from typing import Deque, Dict, List, Optional, Any, Set
 from datetime import datetime, timedelta
 import re
 
+import orjson
+import redis.asyncio as redis
+
 @dataclass
 class ConversationTurn:
     """Represents a single turn in a conversation"""
@@ -22,6 +28,12 @@ class ConversationTurn:
     agent_response: str
     routing_confidence: float
     metadata: Dict[str, Any] = field(default_factory=dict)
+    # ISO form of timestamp, formatted once since turns never change
+    timestamp_iso: str = ""
+    
+    def __post_init__(self):
+        if not self.timestamp_iso:
+            self.timestamp_iso = self.timestamp.isoformat()
 
 @dataclass
 class ConversationSession:
@@ -30,9 +42,21 @@ class ConversationSession:
     user_id: Optional[str]
     created_at: datetime
     last_activity: datetime
-    turns: List[ConversationTurn] = field(default_factory=list)
+    # Most recent turns only, so long-lived sessions stay bounded
+    turns: Deque[ConversationTurn] = field(default_factory=lambda: deque(maxlen=50))
     context_summary: Optional[str] = None
-    active_topics: List[str] = field(default_factory=list)
+    # Most recent topics, oldest dropped first, with a set for membership checks
+    active_topics: Deque[str] = field(default_factory=lambda: deque(maxlen=5))
+    _topics_set: Set[str] = field(init=False, repr=False)
+    # Monotonic twin of last_activity for expiry checks, immune to clock jumps
+    last_activity_mono: float = field(default_factory=time.monotonic, repr=False)
+    
+    def __post_init__(self):
+        if not isinstance(self.turns, deque):
+            self.turns = deque(self.turns, maxlen=50)
+        if not isinstance(self.active_topics, deque):
+            self.active_topics = deque(self.active_topics, maxlen=5)
+        self._topics_set = set(self.active_topics)
 
 class OrchestratorContextManager:
     """
@@ -46,15 +70,54 @@ class OrchestratorContextManager:
     - Cross-agent context sharing
     """
     
-    def __init__(self, session_timeout_hours: int = 24):
+    # Reference resolution pattern, one alternation scanned in a single pass
+    PRONOUN_RE = re.compile(
+        r'\b(?:it|that|this|they|them|the above|the previous|the data)\b', re.IGNORECASE
+    )
+    
+    # Words of every reference above; a query sharing none of them skips the regex
+    PRONOUN_TOKENS = frozenset(['it', 'that', 'this', 'they', 'them', 'above', 'previous', 'data'])
+    # ASCII punctuation plus the typographic quotes, dashes and ellipsis that
+    # editors substitute, so "it\u2019s" still yields the token "it"
+    QUERY_PUNCTUATION = string.punctuation + '\u2018\u2019\u201c\u201d\u2013\u2014\u2026'
+    PUNCTUATION_TO_SPACE = str.maketrans(QUERY_PUNCTUATION, ' ' * len(QUERY_PUNCTUATION))
+    
+    # References rewritten by _resolve_references, all in one substitution pass
+    REFERENCE_RE = re.compile(r'\b(it|that|this|the above|the previous|the data)\b', re.IGNORECASE)
+    
+    # Report generation requests that might need previous context
+    REPORT_REQUEST_RE = re.compile(r'report|generate|create|make|analyze|summarize', re.IGNORECASE)
+    
+    # Topic keywords and the topic each one marks, matched anywhere in the
+    # lower-cased turn text
+    TOPIC_KEYWORDS = {
+        **dict.fromkeys(['weather', 'temperature', 'winter', 'summer', 'rain', 'snow'], 'weather'),
+        **{city: f'location:{city}' for city in ['new york', 'california', 'chicago', 'boston', 'san francisco', 'los angeles']},
+        **dict.fromkeys(['report', 'analysis', 'chart', 'graph', 'visualization'], 'reporting'),
+        **dict.fromkeys(['currency', 'exchange', 'dollar', 'price', 'market'], 'finance'),
+    }
+    # One alternation over every keyword, so the text is scanned once however
+    # many keywords there are; longest first so overlapping keywords resolve
+    TOPIC_RE = re.compile('|'.join(map(re.escape, sorted(TOPIC_KEYWORDS, key=len, reverse=True))))
+    
+    # Location + weather pattern for the main topic of a turn
+    LOCATION_RE = re.compile(r'\b(New York|NYC|California|Chicago|Boston|San Francisco|Los Angeles)\b', re.IGNORECASE)
+    WEATHER_TERM_RE = re.compile(r'\b(weather|winter|summer|temperature|climate)\b', re.IGNORECASE)
+    
+    # Most recent turns kept per session in Redis
+    REDIS_TURN_LIMIT = 20
+    
+    def __init__(self, session_timeout_hours: int = 24, redis_url: Optional[str] = None):
         self.sessions: Dict[str, ConversationSession] = {}
         self.session_timeout = timedelta(hours=session_timeout_hours)
-        
-        # Reference resolution patterns
-        self.pronoun_patterns = [
-            r'\bit\b', r'\bthat\b', r'\bthis\b', r'\bthey\b', r'\bthem\b',
-            r'\bthe above\b', r'\bthe previous\b', r'\bthe data\b'
-        ]
+        # Shared session store so every server process can continue a
+        # conversation; self.sessions is the per-process copy
+        self.redis = redis.Redis.from_url(redis_url) if redis_url else None
+        # Usage across all sessions, kept up to date as turns and topics come
+        # and go so get_session_stats does not rescan every session
+        self._agent_usage: Counter = Counter()
+        self._topic_usage: Counter = Counter()
+        self._turn_count = 0
         
     def get_or_create_session(self, session_id: Optional[str] = None, user_id: Optional[str] = None) -> str:
         """Get existing session or create new one"""
@@ -74,15 +137,18 @@ class OrchestratorContextManager:
                     
                     # If valid UUID and exists in sessions, return it
                     if validated_session_id in self.sessions:
-                        self.sessions[validated_session_id].last_activity = datetime.now()
+                        session = self.sessions[validated_session_id]
+                        session.last_activity = datetime.now()
+                        session.last_activity_mono = time.monotonic()
                         return validated_session_id
                     else:
                         # Valid UUID but doesn't exist yet - create session for it
+                        now = datetime.now()
                         self.sessions[validated_session_id] = ConversationSession(
                             session_id=validated_session_id,
                             user_id=user_id,
-                            created_at=datetime.now(),
-                            last_activity=datetime.now()
+                            created_at=now,
+                            last_activity=now
                         )
                         return validated_session_id
                 except (ValueError, AttributeError, TypeError):
@@ -91,14 +157,92 @@ class OrchestratorContextManager:
         
         # Create new session with valid UUID
         new_session_id = str(uuid.uuid4())
+        now = datetime.now()
         self.sessions[new_session_id] = ConversationSession(
             session_id=new_session_id,
             user_id=user_id,
-            created_at=datetime.now(),
-            last_activity=datetime.now()
+            created_at=now,
+            last_activity=now
         )
         return new_session_id
     
+    async def load_session(self, session_id: str) -> None:
+        """Refresh a session from Redis, if another process has stored it"""
+        if self.redis is None:
+            return
+        
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.get(f"ctx:session:{session_id}")
+            pipe.lrange(f"ctx:turns:{session_id}", 0, -1)
+            data, turns = await pipe.execute()
+        if data is None:
+            return
+        
+        stored = orjson.loads(data)
+        session = ConversationSession(
+            session_id=session_id,
+            user_id=stored["user_id"],
+            created_at=datetime.fromisoformat(stored["created_at"]),
+            last_activity=datetime.now(),
+            turns=[self._turn_from_json(turn) for turn in turns],
+            context_summary=stored["context_summary"],
+            active_topics=stored["active_topics"]
+        )
+        if session_id in self.sessions:
+            self._forget_usage(self.sessions[session_id])
+        self.sessions[session_id] = session
+        self._agent_usage.update(turn.agent_name for turn in session.turns)
+        self._topic_usage.update(session.active_topics)
+        self._turn_count += len(session.turns)
+    
+    @staticmethod
+    def _decrement(counter: Counter, key: str) -> None:
+        """Count one use less, dropping keys that are no longer used"""
+        counter[key] -= 1
+        if counter[key] <= 0:
+            del counter[key]
+    
+    def _forget_usage(self, session: ConversationSession) -> None:
+        """Remove a session's turns and topics from the usage counters"""
+        for turn in session.turns:
+            self._decrement(self._agent_usage, turn.agent_name)
+        for topic in session.active_topics:
+            self._decrement(self._topic_usage, topic)
+        self._turn_count -= len(session.turns)
+    
+    async def save_session(self, session_id: str) -> None:
+        """Store a session and its latest turn in Redis, expiring with the session timeout"""
+        if self.redis is None or session_id not in self.sessions:
+            return
+        
+        session = self.sessions[session_id]
+        ttl = int(self.session_timeout.total_seconds())
+        turns_key = f"ctx:turns:{session_id}"
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(f"ctx:session:{session_id}", orjson.dumps({
+                "user_id": session.user_id,
+                "created_at": session.created_at,
+                "context_summary": session.context_summary,
+                "active_topics": list(session.active_topics)
+            }), ex=ttl)
+            if session.turns:
+                pipe.rpush(turns_key, orjson.dumps(asdict(session.turns[-1])))
+                pipe.ltrim(turns_key, -self.REDIS_TURN_LIMIT, -1)
+                pipe.expire(turns_key, ttl)
+            await pipe.execute()
+    
+    @staticmethod
+    def _turn_from_json(data: bytes) -> ConversationTurn:
+        """Rebuild a conversation turn stored by save_session"""
+        turn = orjson.loads(data)
+        turn["timestamp"] = datetime.fromisoformat(turn["timestamp"])
+        return ConversationTurn(**turn)
+    
+    async def aclose(self) -> None:
+        """Close the Redis connection pool"""
+        if self.redis is not None:
+            await self.redis.aclose()
+    
     def add_conversation_turn(
         self, 
         session_id: str, 
@@ -113,8 +257,9 @@ class OrchestratorContextManager:
             self.get_or_create_session(session_id)
         
         session = self.sessions[session_id]
+        now = datetime.now()
         turn = ConversationTurn(
-            timestamp=datetime.now(),
+            timestamp=now,
             user_query=user_query,
             agent_name=agent_name,
             agent_response=agent_response,
@@ -122,8 +267,15 @@ class OrchestratorContextManager:
             metadata=metadata or {}
         )
         
+        # The deque drops its oldest turn once full
+        if len(session.turns) == session.turns.maxlen:
+            self._decrement(self._agent_usage, session.turns[0].agent_name)
+        else:
+            self._turn_count += 1
         session.turns.append(turn)
-        session.last_activity = datetime.now()
+        self._agent_usage[agent_name] += 1
+        session.last_activity = now
+        session.last_activity_mono = time.monotonic()
         
         # Update active topics
         self._update_active_topics(session, user_query, agent_response)
@@ -131,36 +283,19 @@ class OrchestratorContextManager:
     def _update_active_topics(self, session: ConversationSession, user_query: str, agent_response: str) -> None:
         """Extract and update active topics from conversation"""
         # Simple topic extraction (can be enhanced with NLP)
-        topics = []
-        
-        # Extract potential topics from queries and responses
+        # Extract potential topics from queries and responses, each topic once
         text = f"{user_query} {agent_response}".lower()
+        topics = dict.fromkeys(self.TOPIC_KEYWORDS[keyword] for keyword in self.TOPIC_RE.findall(text))
         
-        # Weather-related topics
-        if any(word in text for word in ['weather', 'temperature', 'winter', 'summer', 'rain', 'snow']):
-            topics.append('weather')
-        
-        # Location topics
-        cities = ['new york', 'california', 'chicago', 'boston', 'san francisco', 'los angeles']
-        for city in cities:
-            if city in text:
-                topics.append(f'location:{city}')
-        
-        # Report topics
-        if any(word in text for word in ['report', 'analysis', 'chart', 'graph', 'visualization']):
-            topics.append('reporting')
-        
-        # Financial topics
-        if any(word in text for word in ['currency', 'exchange', 'dollar', 'price', 'market']):
-            topics.append('finance')
-        
-        # Update session topics (keep only recent topics)
+        # Update session topics; the deque keeps only the last 5
         for topic in topics:
-            if topic not in session.active_topics:
+            if topic not in session._topics_set:
+                if len(session.active_topics) == session.active_topics.maxlen:
+                    session._topics_set.discard(session.active_topics[0])
+                    self._decrement(self._topic_usage, session.active_topics[0])
                 session.active_topics.append(topic)
-        
-        # Keep only last 5 topics
-        session.active_topics = session.active_topics[-5:]
+                session._topics_set.add(topic)
+                self._topic_usage[topic] += 1
     
     def get_conversation_context(self, session_id: str, last_n_turns: int = 3) -> Dict[str, Any]:
         """Get conversation context for a session"""
@@ -168,7 +303,7 @@ class OrchestratorContextManager:
             return {"turns": [], "summary": None, "active_topics": []}
         
         session = self.sessions[session_id]
-        recent_turns = session.turns[-last_n_turns:] if session.turns else []
+        recent_turns = islice(session.turns, max(0, len(session.turns) - last_n_turns), None)
         
         return {
             "session_id": session_id,
@@ -177,13 +312,13 @@ class OrchestratorContextManager:
                     "user_query": turn.user_query,
                     "agent_name": turn.agent_name,
                     "agent_response": turn.agent_response,
-                    "timestamp": turn.timestamp.isoformat(),
+                    "timestamp": turn.timestamp_iso,
                     "confidence": turn.routing_confidence
                 }
                 for turn in recent_turns
             ],
             "summary": session.context_summary,
-            "active_topics": session.active_topics,
+            "active_topics": list(session.active_topics),
             "last_activity": session.last_activity.isoformat()
         }
     
@@ -197,11 +332,17 @@ class OrchestratorContextManager:
             return user_query
         
         # Check if query contains pronouns/references that need resolution
-        needs_context = any(re.search(pattern, user_query.lower()) for pattern in self.pronoun_patterns)
+        # The word check is cheaper than the regex; splitting off ASCII and
+        # typographic punctuation keeps it from missing forms like "it’s",
+        # so most queries without a reference are rejected before the regex runs
+        tokens = user_query.lower().translate(self.PUNCTUATION_TO_SPACE).split()
+        needs_context = (
+            not self.PRONOUN_TOKENS.isdisjoint(tokens)
+            and self.PRONOUN_RE.search(user_query) is not None
+        )
         
         # Also check for report generation requests that might need previous context
-        report_keywords = ['report', 'generate', 'create', 'make', 'analyze', 'summarize']
-        is_report_request = any(keyword in user_query.lower() for keyword in report_keywords)
+        is_report_request = self.REPORT_REQUEST_RE.search(user_query) is not None
         
         # If it's a report request, always include context from previous turns
         if is_report_request and session.turns:
@@ -241,25 +382,25 @@ class OrchestratorContextManager:
     
     def _resolve_references(self, user_query: str, last_turn: ConversationTurn) -> str:
         """Resolve pronouns and references in user query"""
-        enriched_query = user_query
-        
         # Extract key information from last turn
         last_query = last_turn.user_query
         last_response = last_turn.agent_response
+        topic = self._extract_main_topic(last_query, last_response)
+        response_excerpt = last_response[:100]
         
-        # Simple reference resolution patterns
+        # Simple reference resolution, keyed by the lower-cased reference
         replacements = {
-            r'\bit\b': self._extract_main_topic(last_query, last_response),
-            r'\bthat\b': self._extract_main_topic(last_query, last_response),
-            r'\bthis\b': self._extract_main_topic(last_query, last_response),
-            r'\bthe above\b': f"the analysis: {last_response[:100]}...",
-            r'\bthe previous\b': f"the previous query about {self._extract_subject(last_query)}",
-            r'\bthe data\b': f"the data from: {last_response[:100]}..."
+            'it': topic,
+            'that': topic,
+            'this': topic,
+            'the above': f"the analysis: {response_excerpt}...",
+            'the previous': f"the previous query about {self._extract_subject(last_query)}",
+            'the data': f"the data from: {response_excerpt}..."
         }
         
-        for pattern, replacement in replacements.items():
-            if replacement:
-                enriched_query = re.sub(pattern, replacement, enriched_query, flags=re.IGNORECASE)
+        enriched_query = self.REFERENCE_RE.sub(
+            lambda match: replacements[match.group(1).lower()], user_query
+        )
         
         # If query is still unclear, add explicit context
         if len(enriched_query.split()) < 5 and any(word in enriched_query.lower() for word in ['it', 'that', 'this']):
@@ -270,8 +411,8 @@ class OrchestratorContextManager:
     def _extract_main_topic(self, query: str, response: str) -> str:
         """Extract the main topic from query and response"""
         # Look for location + weather pattern
-        locations = re.findall(r'\b(New York|NYC|California|Chicago|Boston|San Francisco|Los Angeles)\b', query, re.IGNORECASE)
-        weather_terms = re.findall(r'\b(weather|winter|summer|temperature|climate)\b', query, re.IGNORECASE)
+        locations = self.LOCATION_RE.findall(query)
+        weather_terms = self.WEATHER_TERM_RE.findall(query)
         
         if locations and weather_terms:
             return f"{weather_terms[0]} in {locations[0]}"
@@ -321,28 +462,24 @@ class OrchestratorContextManager:
     
     def cleanup_expired_sessions(self) -> int:
         """Remove expired sessions and return count of removed sessions"""
-        now = datetime.now()
-        expired_sessions = [
-            session_id for session_id, session in self.sessions.items()
-            if now - session.last_activity > self.session_timeout
-        ]
-        
-        for session_id in expired_sessions:
-            del self.sessions[session_id]
-        
-        return len(expired_sessions)
+        # Only the per-process copies; Redis expires stored sessions itself
+        now = time.monotonic()
+        timeout = self.session_timeout.total_seconds()
+        removed = 0
+        # Snapshot the items so sessions can be dropped during the scan
+        for session_id, session in list(self.sessions.items()):
+            if now - session.last_activity_mono > timeout:
+                self.sessions.pop(session_id, None)
+                self._forget_usage(session)
+                removed += 1
+        
+        return removed
     
     def get_session_stats(self) -> Dict[str, Any]:
         """Get statistics about active sessions"""
         return {
             "total_sessions": len(self.sessions),
-            "total_turns": sum(len(session.turns) for session in self.sessions.values()),
-            "active_topics": list(set(
-                topic for session in self.sessions.values() 
-                for topic in session.active_topics
-            )),
-            "agents_used": list(set(
-                turn.agent_name for session in self.sessions.values()
-                for turn in session.turns
-            ))
+            "total_turns": self._turn_count,
+            "active_topics": list(self._topic_usage),
+            "agents_used": list(self._agent_usage)
         }
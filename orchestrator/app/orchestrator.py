@@ -3,29 +3,36 @@
 Smart Orchestrator Agent with A2A SDK integration and Context Management
 """
 import asyncio
+import json
+import logging
 import os
 import re
 import uuid
+from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, TypedDict, Tuple, Any
+from typing import Awaitable, Callable, Dict, List, Optional, Set, TypedDict, Tuple, Any
 from a2a.client import A2AClient, A2ACardResolver
 
 import httpx
 from dotenv import load_dotenv
+from langchain_core.runnables import RunnableConfig
 from langgraph.graph import StateGraph
 from a2a.types import AgentCard, AgentSkill, AgentCapabilities
 from app.context_manager import OrchestratorContextManager
 
+logger = logging.getLogger(__name__)
+
 # Load environment variables from .env file in project root
 project_root = Path(__file__).parent.parent.parent
 load_dotenv(dotenv_path=project_root / ".env")
 
-# LangSmith tracing configuration
-os.environ.setdefault("LANGCHAIN_TRACING_V2", "true")
-os.environ.setdefault("LANGCHAIN_ENDPOINT", os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com"))
-os.environ.setdefault("LANGCHAIN_API_KEY", os.getenv("LANGSMITH_API_KEY", ""))
-os.environ.setdefault("LANGCHAIN_PROJECT", os.getenv("LANGSMITH_PROJECT", "03892bba-bf1e-4c69-82d9-1058208e56ae"))
+# LangSmith tracing, only enabled when a real key is configured
+if os.getenv("LANGSMITH_API_KEY"):
+    os.environ.setdefault("LANGCHAIN_TRACING_V2", "true")
+    os.environ.setdefault("LANGCHAIN_ENDPOINT", os.getenv("LANGSMITH_ENDPOINT", "https://api.smith.langchain.com"))
+    os.environ.setdefault("LANGCHAIN_API_KEY", os.environ["LANGSMITH_API_KEY"])
+    os.environ.setdefault("LANGCHAIN_PROJECT", os.getenv("LANGSMITH_PROJECT", "03892bba-bf1e-4c69-82d9-1058208e56ae"))
 
 class RouterState(TypedDict):
     request: str
@@ -39,18 +46,67 @@ class RouterState(TypedDict):
     metadata: dict
 
 
+def create_http_client() -> httpx.AsyncClient:
+    """Create the pooled HTTP client used for calls to downstream agents"""
+    return httpx.AsyncClient(
+        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+        timeout=httpx.Timeout(30.0, connect=5.0)
+    )
+
+
 class SmartOrchestrator:
     """Intelligent orchestrator using A2A SDK types and LangGraph workflow with Context Management"""
     
-    def __init__(self):
+    # Maximum number of routing decisions kept for repeated requests
+    ROUTING_CACHE_SIZE = 4096
+    
+    def __init__(self, httpx_client: Optional[httpx.AsyncClient] = None, discovery_concurrency: int = 8):
+        # Pooled client shared by every call to downstream agents
+        self.httpx_client = httpx_client
+        # Maximum number of agent cards fetched at once during discovery
+        self.discovery_concurrency = discovery_concurrency
         self.agents: Dict[str, AgentCard] = {}
         self.skill_keywords: Dict[str, List[str]] = {}
+        self.agent_tags: Dict[str, List[str]] = {}
+        # Agent ids by endpoint URL and by lowercased name, for unregistering
+        self.agent_ids_by_url: Dict[str, str] = {}
+        self.agent_ids_by_name: Dict[str, str] = {}
         self.agent_capabilities: Dict[str, Dict[str, Any]] = {}
-        self.context_manager = OrchestratorContextManager()
+        # Every distinct keyword scored by routing, scanned once per request
+        self.keyword_vocabulary: List[str] = []
+        # Lowercased examples and (skill name, description) pairs per agent
+        self.agent_examples_lower: Dict[str, List[str]] = {}
+        self.agent_descriptions_lower: Dict[str, List[Tuple[str, str]]] = {}
+        # Highest keyword score and request-independent part of the highest
+        # semantic score each agent can reach, for pruning during routing
+        self.agent_score_bounds: Dict[str, Tuple[float, float]] = {}
+        # Bumped on every registry change; routing decisions are cached per
+        # (lowercased request, registry version)
+        self.registry_version = 0
+        self._routing_cache: "OrderedDict[Tuple[str, int], Tuple]" = OrderedDict()
+        # Sessions are shared through Redis when configured
+        self.context_manager = OrchestratorContextManager(redis_url=os.getenv("REDIS_URL"))
         self.workflow = self._create_workflow()
-        self._initialize_default_agents()
     
-    def _initialize_default_agents(self):
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared HTTP client, creating it on first use"""
+        if self.httpx_client is None:
+            self.httpx_client = create_http_client()
+        return self.httpx_client
+    
+    async def aclose(self):
+        """Close the shared HTTP client and the session store"""
+        if self.httpx_client is not None:
+            await self.httpx_client.aclose()
+            self.httpx_client = None
+        await self.context_manager.aclose()
+    
+    async def startup(self):
+        """Load the default agents; called once the server's event loop is running"""
+        await self._initialize_default_agents()
+        print(f"Orchestrator initialized with {len(self.agents)} agents: {list(self.agents.keys())}")
+    
+    async def _initialize_default_agents(self):
         """Initialize default agents by fetching their agent cards using A2A client"""
         
         # Default agent endpoints
@@ -62,22 +118,34 @@ class SmartOrchestrator:
             "http://localhost:8005",  # Report Agent
         ]
         
-        # Fetch agent cards using A2A client - run async initialization
-        asyncio.run(self._fetch_all_agent_cards(default_agents))
+        # Fetch agent cards using A2A client on the running loop
+        await self._fetch_all_agent_cards(default_agents)
     
     async def _fetch_all_agent_cards(self, default_agents: List[str]):
         """Async method to fetch all agent cards"""
-        async with httpx.AsyncClient(timeout=5.0) as httpx_client:
-            for endpoint in default_agents:
-                try:
-                    agent_card = await self._fetch_agent_card_with_a2a(httpx_client, endpoint)
-                    if agent_card:
-                        self.agents[agent_card.name] = agent_card
-                        print(f"Loaded {agent_card.name} from {endpoint}")
-                    else:
-                        print(f"WARNING: Failed to load agent card from {endpoint}")
-                except Exception as e:
-                    print(f"ERROR: Error loading agent from {endpoint}: {e}")
+        # Bound the fan-out so a long endpoint list doesn't open every socket at once
+        semaphore = asyncio.Semaphore(self.discovery_concurrency)
+        httpx_client = self._get_http_client()
+        
+        async def fetch(endpoint: str) -> Optional[AgentCard]:
+            async with semaphore:
+                return await self._fetch_agent_card_with_a2a(httpx_client, endpoint)
+        
+        # Fetch every card concurrently so startup costs one round-trip, not N
+        results = await asyncio.gather(
+            *(fetch(endpoint) for endpoint in default_agents),
+            return_exceptions=True
+        )
+        
+        # Apply the results in endpoint order so the registry is deterministic
+        for endpoint, agent_card in zip(default_agents, results):
+            if isinstance(agent_card, Exception):
+                print(f"ERROR: Error loading agent from {endpoint}: {agent_card}")
+            elif agent_card:
+                self.agents[agent_card.name] = agent_card
+                print(f"Loaded {agent_card.name} from {endpoint}")
+            else:
+                print(f"WARNING: Failed to load agent card from {endpoint}")
         
         # Update skill keywords and agent capabilities after loading all default agents
         self._update_skill_keywords()
@@ -93,7 +161,7 @@ class SmartOrchestrator:
             )
             
             # Fetch agent card using the resolver
-            agent_card = await resolver.get_agent_card()
+            agent_card = await resolver.get_agent_card(http_kwargs={"timeout": 5.0})
             return agent_card
                 
         except Exception as e:
@@ -109,33 +177,45 @@ class SmartOrchestrator:
     def _update_skill_keywords(self):
         """Update skill keywords based on currently available agents"""
         self.skill_keywords = {}
+        self.agent_tags = {}
+        
+        # Keywords per skill name as insertion-ordered dicts, so duplicates are
+        # dropped with a hash lookup instead of rescanning the list
+        skill_keywords: Dict[str, Dict[str, None]] = {}
+        self.registry_version += 1
+        self._routing_cache.clear()
+        self.agent_ids_by_url = {}
+        self.agent_ids_by_name = {}
         
         for agent_id, agent_card in self.agents.items():
+            # The earliest registered agent wins when URLs or names collide
+            self.agent_ids_by_url.setdefault(agent_card.url, agent_id)
+            self.agent_ids_by_name.setdefault(agent_card.name.lower(), agent_id)
+            agent_tags = []
+            
             for skill in agent_card.skills:
                 skill_name = skill.name
+                keywords = skill_keywords.setdefault(skill_name, {})
                 
-                # Initialize skill keywords list if not exists
-                if skill_name not in self.skill_keywords:
-                    self.skill_keywords[skill_name] = []
-                
-                # Add tags from this skill as keywords
-                if skill.tags:
-                    for tag in skill.tags:
-                        if tag.lower() not in [kw.lower() for kw in self.skill_keywords[skill_name]]:
-                            self.skill_keywords[skill_name].append(tag.lower())
+                # Add tags from this skill as keywords, lowercased once here
+                # rather than on every request
+                tags_lower = [tag.lower() for tag in (skill.tags or [])]
+                agent_tags.extend(tags_lower)
+                keywords.update(dict.fromkeys(tags_lower))
                 
                 # Add skill name itself as a keyword
-                skill_name_lower = skill_name.lower().replace("_", " ")
-                if skill_name_lower not in [kw.lower() for kw in self.skill_keywords[skill_name]]:
-                    self.skill_keywords[skill_name].append(skill_name_lower)
+                keywords[skill_name.lower().replace("_", " ")] = None
                 
                 # Add description words as keywords (first 3 words)
                 if skill.description:
-                    desc_words = skill.description.lower().split()[:3]
-                    for word in desc_words:
-                        # Only add meaningful words (length > 2)
-                        if len(word) > 2 and word not in [kw.lower() for kw in self.skill_keywords[skill_name]]:
-                            self.skill_keywords[skill_name].append(word)
+                    # Only add meaningful words (length > 2)
+                    keywords.update(dict.fromkeys(
+                        word for word in skill.description.lower().split()[:3] if len(word) > 2
+                    ))
+            
+            self.agent_tags[agent_id] = agent_tags
+        
+        self.skill_keywords = {skill_name: list(keywords) for skill_name, keywords in skill_keywords.items()}
         
         print(f"Updated skill keywords for {len(self.skill_keywords)} skills from {len(self.agents)} agents")
     
@@ -187,34 +267,65 @@ class SmartOrchestrator:
             self.agent_capabilities[agent_id]["domains"] = list(self.agent_capabilities[agent_id]["domains"])
             self.agent_capabilities[agent_id]["keywords"] = list(self.agent_capabilities[agent_id]["keywords"])
         
+        # Lowercase the texts semantic scoring compares against, once per registry change
+        self.agent_examples_lower = {
+            agent_id: [example.lower() for example in agent_cap["examples"]]
+            for agent_id, agent_cap in self.agent_capabilities.items()
+        }
+        self.agent_descriptions_lower = {
+            agent_id: [(skill_info["name"], skill_info["description"].lower()) for skill_info in agent_cap["skills"].values()]
+            for agent_id, agent_cap in self.agent_capabilities.items()
+        }
+        
+        # Every tag and skill can match at most once, as can every domain,
+        # keyword and example; description matches also depend on the request
+        self.agent_score_bounds = {
+            agent_id: (
+                1.0 * len(self.agent_tags.get(agent_id, ())) + 1.5 * len(self.agents[agent_id].skills),
+                0.5 * len(agent_cap["domains"]) + 0.7 * len(agent_cap["keywords"]) + 0.3 * len(agent_cap["examples"])
+            )
+            for agent_id, agent_cap in self.agent_capabilities.items()
+        }
+        
+        # Tags, skill keywords, domains and capability keywords all score by
+        # substring match, so each distinct one only needs checking once
+        vocabulary = set()
+        for tags in self.agent_tags.values():
+            vocabulary.update(tags)
+        for keywords in self.skill_keywords.values():
+            vocabulary.update(keywords)
+        for agent_cap in self.agent_capabilities.values():
+            vocabulary.update(agent_cap["domains"])
+            vocabulary.update(agent_cap["keywords"])
+        self.keyword_vocabulary = list(vocabulary)
+        
         print(f"Extracted capabilities for {len(self.agent_capabilities)} agents")
     
     async def register_agent(self, endpoint: str) -> Dict:
         """Register a new agent by fetching its agent card from the endpoint"""
         try:
-            async with httpx.AsyncClient(timeout=5.0) as httpx_client:
-                agent_card = await self._fetch_agent_card_with_a2a(httpx_client, endpoint)
-                if agent_card:
-                    # Generate agent_id from the endpoint
-                    agent_id = agent_card.name
-                    
-                    # Add the agent to our registry
-                    self.agents[agent_id] = agent_card
-                    self._update_skill_keywords()
-                    self._extract_agent_capabilities()
-                    
-                    return {
-                        "success": True,
-                        "agent_id": agent_id,
-                        "agent_name": agent_card.name,
-                        "endpoint": endpoint,
-                        "message": f"Successfully registered {agent_card.name} from {endpoint}"
-                    }
-                else:
-                    return {
-                        "success": False,
-                        "error": f"Failed to fetch agent card from {endpoint}"
-                    }
+            agent_card = await self._fetch_agent_card_with_a2a(self._get_http_client(), endpoint)
+            if agent_card:
+                # Generate agent_id from the endpoint
+                agent_id = agent_card.name
+                
+                # Add the agent to our registry
+                self.agents[agent_id] = agent_card
+                self._update_skill_keywords()
+                self._extract_agent_capabilities()
+                
+                return {
+                    "success": True,
+                    "agent_id": agent_id,
+                    "agent_name": agent_card.name,
+                    "endpoint": endpoint,
+                    "message": f"Successfully registered {agent_card.name} from {endpoint}"
+                }
+            else:
+                return {
+                    "success": False,
+                    "error": f"Failed to fetch agent card from {endpoint}"
+                }
         except Exception as e:
             return {
                 "success": False,
@@ -236,41 +347,29 @@ class SmartOrchestrator:
     async def unregister_agent(self, agent_identifier: str) -> Dict:
         """Unregister an agent by agent_id, endpoint, or name"""
         try:
-            agent_to_remove = None
-            agent_id_to_remove = None
+            # Match by agent_id, then endpoint/URL, then name
+            agent_id_to_remove = (
+                agent_identifier if agent_identifier in self.agents
+                else self.agent_ids_by_url.get(agent_identifier)
+                or self.agent_ids_by_name.get(agent_identifier.lower())
+            )
+            
+            # Match by partial endpoint (e.g., localhost:8080)
+            if agent_id_to_remove is None:
+                agent_id_to_remove = next(
+                    (agent_id for agent_id, agent_card in self.agents.items() if agent_identifier in agent_card.url),
+                    None
+                )
             
-            # Try to find the agent by different identifiers
-            for agent_id, agent_card in self.agents.items():
-                # Match by agent_id
-                if agent_id == agent_identifier:
-                    agent_to_remove = agent_card
-                    agent_id_to_remove = agent_id
-                    break
-                # Match by endpoint/URL
-                elif agent_card.url == agent_identifier:
-                    agent_to_remove = agent_card
-                    agent_id_to_remove = agent_id
-                    break
-                # Match by name
-                elif agent_card.name.lower() == agent_identifier.lower():
-                    agent_to_remove = agent_card
-                    agent_id_to_remove = agent_id
-                    break
-                # Match by partial endpoint (e.g., localhost:8080)
-                elif agent_identifier in agent_card.url:
-                    agent_to_remove = agent_card
-                    agent_id_to_remove = agent_id
-                    break
+            agent_to_remove = self.agents.get(agent_id_to_remove) if agent_id_to_remove is not None else None
             
             if agent_to_remove and agent_id_to_remove:
                 # Remove the agent from registry
                 del self.agents[agent_id_to_remove]
                 
-                # Also remove from capabilities
-                if agent_id_to_remove in self.agent_capabilities:
-                    del self.agent_capabilities[agent_id_to_remove]
-                
+                # Rebuild keywords, capabilities and the routing vocabulary
                 self._update_skill_keywords()
+                self._extract_agent_capabilities()
                 
                 return {
                     "success": True,
@@ -325,22 +424,100 @@ class SmartOrchestrator:
     async def _analyze_request(self, state: RouterState) -> RouterState:
         """Analyze the request and select the best agent using intelligent routing"""
         request = state["request"]
+        request_lower = request.lower()
         
-        # Log the start of agent selection
-        print(f"\nAGENT SELECTION STARTED")
-        print(f"Request: '{request}'")
-        print(f"Available agents: {list(self.agents.keys())}")
-        print(f"Analyzing {len(self.agents)} agents for best match...")
+        # Scoring only depends on the request text and the registry, so
+        # repeated requests reuse the earlier decision
+        cache_key = (request_lower, self.registry_version)
+        routing = self._routing_cache.get(cache_key)
+        if routing is None:
+            routing = self._score_request(request, request_lower)
+            self._routing_cache[cache_key] = routing
+            if len(self._routing_cache) > self.ROUTING_CACHE_SIZE:
+                self._routing_cache.popitem(last=False)
+        else:
+            self._routing_cache.move_to_end(cache_key)
+        best_agent, confidence, reasoning, agent_scores, skill_matches, semantic_matches, pruned_agents = routing
+        
+        logger.info(
+            "Selected agent: %s (confidence %.2f)",
+            self.agents[best_agent].name if best_agent else "None",
+            confidence if best_agent else 0.0
+        )
         
-        # Get scores for all agents based on request content
+        # Both timestamps were always taken after scoring, so one clock read
+        # serves them
+        timestamp = datetime.now().isoformat()
+        
+        # Update state with routing decision; the metadata gets its own copies
+        # so callers cannot alter the cached decision
+        state.update({
+            "selected_agent": best_agent if best_agent else "",
+            "confidence": confidence if best_agent else 0.0,
+            "reasoning": reasoning,
+            "metadata": {
+                "request_id": str(uuid.uuid4()),
+                "start_timestamp": timestamp,
+                "agent_scores": dict(agent_scores),
+                "skill_matches": dict(skill_matches),
+                "semantic_matches": dict(semantic_matches),
+                "pruned_agents": list(pruned_agents),
+                "analysis_timestamp": timestamp
+            }
+        })
+        
+        return state
+    
+    def _score_request(self, request: str, request_lower: str) -> Tuple[Optional[str], float, str, Dict, Dict, Dict, List[str]]:
+        """Score the agents for a request and return the routing decision with its match details"""
+        # Per-agent diagnostics are only assembled when debug logging is on
+        debug = logger.isEnabledFor(logging.DEBUG)
+        if debug:
+            logger.debug("Agent selection started for %r; analyzing %d agents: %s", request, len(self.agents), list(self.agents))
+        
+        # Get scores for agents that can still win, tracking the best agent
+        # in the same pass; pruned agents get a 0.0 score and no matches, so
+        # the maps always list each registered agent, and are named in
+        # pruned_agents
         agent_scores = {}
         skill_matches = {}
         semantic_matches = {}
+        pruned_agents = []
+        best_agent = None
+        best_score = 0.0
+        
+        # Lowercase and split the request once for every agent; find every
+        # known keyword in it in one pass over the vocabulary, so the
+        # per-agent scoring below only does set lookups
+        request_words = request_lower.split()
+        matched_keywords = self._match_keywords(request_lower)
+        significant_count = sum(1 for word in request_words if len(word) > 3)
         
         for agent_id, agent_card in self.agents.items():
+            # Skip agents whose best possible score cannot beat the leader;
+            # ties keep the earlier agent, so equal bounds are skipped too
+            bounds = self.agent_score_bounds.get(agent_id)
+            if bounds is not None:
+                keyword_bound, semantic_bound = bounds
+                semantic_bound += 0.4 * len(self.agent_descriptions_lower[agent_id]) * significant_count
+                if best_score > 0 and (keyword_bound * 0.6) + (semantic_bound * 0.4) + 1e-9 <= best_score:
+                    agent_scores[agent_id] = 0.0
+                    skill_matches[agent_id] = []
+                    semantic_matches[agent_id] = []
+                    pruned_agents.append(agent_id)
+                    continue
+            
             # Calculate score using multiple methods for better accuracy
-            keyword_score, matched_skills = self._calculate_keyword_score(request, agent_card)
-            semantic_score, semantic_reasons = self._calculate_semantic_score(request, agent_id)
+            keyword_score, matched_skills = self._calculate_keyword_score(request_lower, agent_card, agent_id, matched_keywords)
+            
+            # Skip the semantic pass when the keyword score already rules the agent out
+            if bounds is not None and best_score > 0 and (keyword_score * 0.6) + (semantic_bound * 0.4) + 1e-9 <= best_score:
+                agent_scores[agent_id] = 0.0
+                skill_matches[agent_id] = []
+                semantic_matches[agent_id] = []
+                pruned_agents.append(agent_id)
+                continue
+            semantic_score, semantic_reasons = self._calculate_semantic_score(request_lower, agent_id, matched_keywords, request_words)
             
             # Combine scores with appropriate weights
             # Keyword matching is more precise but limited, semantic matching is broader
@@ -350,36 +527,33 @@ class SmartOrchestrator:
             skill_matches[agent_id] = matched_skills
             semantic_matches[agent_id] = semantic_reasons
             
-            # Log detailed scoring for each agent
-            print(f"\nAgent: {agent_card.name} (ID: {agent_id})")
-            print(f"   Keyword Score: {keyword_score:.2f} (matched skills: {matched_skills})")
-            print(f"   Semantic Score: {semantic_score:.2f} (reasons: {semantic_reasons})")
-            print(f"   Combined Score: {combined_score:.2f}")
-        
-        # Find the best agent based on combined score
-        best_agent = None
-        best_score = 0.0
-        
-        for agent_id, score in agent_scores.items():
-            if score > best_score:
-                best_score = score
+            # Strictly greater, so ties go to the earlier registered agent
+            if combined_score > best_score:
+                best_score = combined_score
                 best_agent = agent_id
+            
+            if debug:
+                logger.debug(
+                    "Agent %s: keyword %.2f (skills: %s), semantic %.2f (reasons: %s), combined %.2f",
+                    agent_id, keyword_score, matched_skills, semantic_score, semantic_reasons, combined_score
+                )
         
-        # Get number of agents for normalization
-        num_agents = len(agent_scores)
+        # Get number of agents for normalization, counting pruned agents too
+        num_agents = len(self.agents)
         
-        print(f"\nSCORING RESULTS:")
-        print(f"   Best Agent: {best_agent}")
-        print(f"   Best Score: {best_score:.2f}")
-        print(f"   Number of Agents: {num_agents}")
-        print(f"   All Scores: {[(aid, f'{score:.2f}') for aid, score in sorted(agent_scores.items(), key=lambda x: x[1], reverse=True)]}")
+        if debug:
+            logger.debug(
+                "Scoring results: best %s (%.2f) of %d agents; all scores: %s",
+                best_agent, best_score, num_agents,
+                sorted(agent_scores.items(), key=lambda x: x[1], reverse=True)
+            )
         
         # If no agent has a good score, don't default to any specific agent
         # This makes the orchestrator more flexible and not biased toward any agent
         if best_score < 0.2:  # Minimum threshold for confidence
-            print(f"ERROR: No agent meets minimum threshold (0.2), best score was {best_score:.2f}")
+            logger.debug("No agent meets minimum threshold (0.2), best score was %.2f", best_score)
             best_agent = None
-            best_score = 0.0
+            confidence = 0.0
             reasoning = "No agent has sufficient capability to handle this request"
         else:
             # Calculate confidence (0.0 to 1.0)
@@ -394,35 +568,28 @@ class SmartOrchestrator:
                     best_agent, 
                     agent_scores, 
                     skill_matches, 
-                    semantic_matches
+                    semantic_matches,
+                    matched_keywords
                 )
             else:
                 reasoning = "No suitable agent found"
         
-        print(f"\nFINAL SELECTION:")
-        print(f"   Selected Agent: {self.agents[best_agent].name if best_agent else 'None'}")
-        print(f"   Confidence: {confidence if best_agent else 0.0:.2f}")
-        print(f"   Reasoning: {reasoning}")
-        print(f"AGENT SELECTION COMPLETED\n")
+        if debug:
+            logger.debug("Routing reasoning: %s", reasoning)
         
-        # Update state with routing decision
-        state.update({
-            "selected_agent": best_agent if best_agent else "",
-            "confidence": confidence if best_agent else 0.0,
-            "reasoning": reasoning,
-            "metadata": {
-                "request_id": str(uuid.uuid4()),
-                "start_timestamp": datetime.now().isoformat(),
-                "agent_scores": agent_scores,
-                "skill_matches": skill_matches,
-                "semantic_matches": semantic_matches,
-                "analysis_timestamp": datetime.now().isoformat()
-            }
-        })
-        
-        return state
+        return best_agent, confidence, reasoning, agent_scores, skill_matches, semantic_matches, pruned_agents
     
-    def _calculate_keyword_score(self, request: str, agent_card: AgentCard) -> Tuple[float, List[str]]:
+    def _match_keywords(self, request_lower: str) -> Set[str]:
+        """Return the vocabulary keywords that occur in the lowercased request"""
+        return {keyword for keyword in self.keyword_vocabulary if keyword in request_lower}
+    
+    def _calculate_keyword_score(
+        self,
+        request_lower: str,
+        agent_card: AgentCard,
+        agent_id: Optional[str] = None,
+        matched_keywords: Optional[Set[str]] = None
+    ) -> Tuple[float, List[str]]:
         """
         Calculate score for an agent based on keywords and skills matching.
         
@@ -436,23 +603,33 @@ class SmartOrchestrator:
         score = 0.0
         matched_skills = []
         
-        request_lower = request.lower()
+        if matched_keywords is None:
+            matched_keywords = self._match_keywords(request_lower)
         
         # Keyword matching from skill tags (weight: 1.0)
-        keywords = [tag for skill in agent_card.skills for tag in (skill.tags or [])]
-        for keyword in keywords:
-            if keyword.lower() in request_lower:
-                score += 1.0
+        keywords = self.agent_tags.get(agent_id)
+        if keywords is None:
+            # Not indexed yet, so its tags may be missing from the vocabulary
+            keywords = [tag.lower() for skill in agent_card.skills for tag in (skill.tags or [])]
+            score += sum(1.0 for keyword in keywords if keyword in request_lower)
+        else:
+            score += sum(1.0 for keyword in keywords if keyword in matched_keywords)
 
         # Skill matching (weight: 1.5)
         for skill in agent_card.skills:
-            if self._skill_matches_request(skill.name, request):
+            if self._skill_matches_request(skill.name, matched_keywords):
                 score += 1.5
                 matched_skills.append(skill.name)
         
         return score, matched_skills
     
-    def _calculate_semantic_score(self, request: str, agent_id: str) -> Tuple[float, List[str]]:
+    def _calculate_semantic_score(
+        self,
+        request_lower: str,
+        agent_id: str,
+        matched_keywords: Optional[Set[str]] = None,
+        request_words: Optional[List[str]] = None
+    ) -> Tuple[float, List[str]]:
         """
         Calculate semantic similarity score between request and agent capabilities.
         This provides a more nuanced understanding beyond simple keyword matching.
@@ -468,46 +645,47 @@ class SmartOrchestrator:
             return 0.0, []
         
         agent_cap = self.agent_capabilities[agent_id]
-        request_lower = request.lower()
+        if matched_keywords is None:
+            matched_keywords = self._match_keywords(request_lower)
+        if request_words is None:
+            request_words = request_lower.split()
         
         # Check for domain matches
         for domain in agent_cap["domains"]:
-            if domain in request_lower:
+            if domain in matched_keywords:
                 score += 0.5
                 reasons.append(f"Request mentions domain: {domain}")
         
         # Check for keyword matches
         for keyword in agent_cap["keywords"]:
-            if keyword in request_lower:
+            if keyword in matched_keywords:
                 score += 0.7
                 reasons.append(f"Request contains keyword: {keyword}")
         
         # Check for example similarity
-        for example in agent_cap["examples"]:
+        for example, example_lower in zip(agent_cap["examples"], self.agent_examples_lower[agent_id]):
             # Simple similarity check - can be enhanced with embeddings
-            if any(word in example.lower() for word in request_lower.split()):
+            if any(word in example_lower for word in request_words):
                 score += 0.3
                 reasons.append(f"Request similar to example: {example}")
         
         # Check skill descriptions for relevance
-        for skill_id, skill_info in agent_cap["skills"].items():
-            description = skill_info["description"].lower()
-            # Check if any significant words from request appear in description
-            significant_words = [w for w in request_lower.split() if len(w) > 3]
+        # Check if any significant words from request appear in description
+        significant_words = [w for w in request_words if len(w) > 3]
+        for skill_name, description in self.agent_descriptions_lower[agent_id]:
             for word in significant_words:
                 if word in description:
                     score += 0.4
-                    reasons.append(f"Request term '{word}' matches skill: {skill_info['name']}")
+                    reasons.append(f"Request term '{word}' matches skill: {skill_name}")
         
         return score, reasons[:3]  # Return top 3 reasons only
     
-    def _skill_matches_request(self, skill_name: str, request: str) -> bool:
+    def _skill_matches_request(self, skill_name: str, matched_keywords: Set[str]) -> bool:
         """Check if a skill matches the request content using dynamic keywords from available agents"""
         # Get keywords for this skill from the dynamically built skill_keywords
         keywords = self.skill_keywords.get(skill_name, [])
-        request_lower = request.lower()
         
-        return any(keyword in request_lower for keyword in keywords)
+        return any(keyword in matched_keywords for keyword in keywords)
     
     def _generate_reasoning(
         self, 
@@ -515,7 +693,8 @@ class SmartOrchestrator:
         selected_agent: str, 
         agent_scores: Dict, 
         skill_matches: Dict,
-        semantic_matches: Dict
+        semantic_matches: Dict,
+        request_keywords: Optional[Set[str]] = None
     ) -> str:
         """Generate human-readable reasoning for the routing decision"""
         if not selected_agent:
@@ -524,13 +703,13 @@ class SmartOrchestrator:
         agent_card = self.agents[selected_agent]
         
         # Find matched keywords from skill tags
-        matched_keywords = []
-        request_lower = request.lower()
         keywords = [tag for skill in agent_card.skills for tag in (skill.tags or [])]
-
-        for keyword in keywords:
-            if keyword.lower() in request_lower:
-                matched_keywords.append(keyword)
+        if request_keywords is not None and selected_agent in self.agent_tags:
+            # Reuse the keywords found while scoring instead of rescanning the request
+            matched_keywords = [keyword for keyword in keywords if keyword.lower() in request_keywords]
+        else:
+            request_lower = request.lower()
+            matched_keywords = [keyword for keyword in keywords if keyword.lower() in request_lower]
         
         # Get matched skills and semantic reasons
         matched_skills = skill_matches.get(selected_agent, [])
@@ -555,7 +734,7 @@ class SmartOrchestrator:
         
         return " ".join(reasoning_parts)
     
-    async def _route_to_agent(self, state: RouterState) -> RouterState:
+    async def _route_to_agent(self, state: RouterState, config: RunnableConfig) -> RouterState:
         """Route the request to the selected agent"""
         selected_agent = state["selected_agent"]
         request = state["request"]
@@ -635,9 +814,16 @@ class SmartOrchestrator:
                     f"for {request_type}"
                 )
             
+            # Relay progress from agents that stream their replies
+            on_progress = config.get("configurable", {}).get("on_progress")
+            if not agent_card.capabilities.streaming:
+                on_progress = None
+            
             print(f"   Forwarding request to agent...")
             # Forward the request to the selected agent and get the actual response
-            actual_response = await self._forward_request_to_agent(endpoint, request, state["session_id"], context_data)
+            actual_response = await self._forward_request_to_agent(
+                endpoint, request, state["session_id"], context_data, on_progress=on_progress
+            )
             print(f"   Received response from agent: '{actual_response[:100]}{'...' if len(actual_response) > 100 else ''}'")
             state["response"] = f"Routed to {agent_card.name}: {actual_response}"
             state["metadata"]["status"] = "completed"
@@ -663,9 +849,15 @@ class SmartOrchestrator:
         
         return state
     
-    async def _forward_request_to_agent(self, endpoint: str, request: str, session_id: str, context_data: Optional[Dict] = None) -> str:
+    async def _forward_request_to_agent(
+        self,
+        endpoint: str,
+        request: str,
+        session_id: str,
+        context_data: Optional[Dict] = None,
+        on_progress: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> str:
         """Forward request to agent using A2A protocol with consistent session ID"""
-        import json
         from uuid import uuid4, UUID
         
         # Validate session_id is a valid UUID
@@ -784,146 +976,154 @@ class SmartOrchestrator:
             print(f"   Payload method: {payload.get('method')}")
             print(f"   Payload params keys: {list(payload.get('params', {}).keys())}")
             
-            # Increased timeout for RAG agent which may take longer to process
-            async with httpx.AsyncClient(timeout=60.0) as client:
-                # Send task to agent - A2A protocol expects POST to root endpoint
-                print(f"   POST request to {endpoint_clean}...")
-                try:
-                    response = await client.post(
-                        endpoint_clean,
-                        json=payload,
-                        headers={"Content-Type": "application/json"}
-                    )
-                    print(f"   Response status: {response.status_code}")
-                    print(f"   Response headers: {dict(response.headers)}")
-                    print(f"   Response text (first 500 chars): {response.text[:500]}")
-                except httpx.ConnectError as conn_err:
-                    print(f"   CONNECTION ERROR DETAILS: {conn_err}")
-                    print(f"   Error type: {type(conn_err)}")
-                    raise
-                except httpx.HTTPStatusError as http_err:
-                    print(f"   HTTP ERROR DETAILS: Status {http_err.response.status_code}")
-                    print(f"   Response text: {http_err.response.text[:500]}")
-                    raise
-                response.raise_for_status()
-                
-                result = response.json()
-                print(f"   Response JSON keys: {list(result.keys())}")
-                
-                # Check for JSON-RPC error
-                if "error" in result:
-                    error_details = result['error']
-                    print(f"   JSON-RPC error: {error_details}")
-                    raise Exception(f"Agent returned JSON-RPC error: {error_details}")
-                
-                # Get the response from message/send
-                if "result" not in result:
-                    raise Exception("No result in agent response")
-                
-                message_result = result["result"]
-                
-                # For message/send, the response might be a Task or Message
-                if isinstance(message_result, dict):
-                    # If it's a Task, we need to poll for completion
-                    if "id" in message_result and "status" in message_result:
-                        task_id = message_result["id"]
+            # Reuse the pooled client; the send below raises the timeout for
+            # the RAG agent, which may take longer to process
+            client = self._get_http_client()
+            
+            if on_progress is not None:
+                # Stream the reply so progress reaches the caller as it happens
+                payload["method"] = "message/stream"
+                return await self._stream_request_to_agent(client, endpoint_clean, payload, on_progress)
+            
+            # Send task to agent - A2A protocol expects POST to root endpoint
+            print(f"   POST request to {endpoint_clean}...")
+            try:
+                response = await client.post(
+                    endpoint_clean,
+                    json=payload,
+                    headers={"Content-Type": "application/json"},
+                    timeout=60.0
+                )
+                print(f"   Response status: {response.status_code}")
+                print(f"   Response headers: {dict(response.headers)}")
+                print(f"   Response text (first 500 chars): {response.text[:500]}")
+            except httpx.ConnectError as conn_err:
+                print(f"   CONNECTION ERROR DETAILS: {conn_err}")
+                print(f"   Error type: {type(conn_err)}")
+                raise
+            except httpx.HTTPStatusError as http_err:
+                print(f"   HTTP ERROR DETAILS: Status {http_err.response.status_code}")
+                print(f"   Response text: {http_err.response.text[:500]}")
+                raise
+            response.raise_for_status()
+            
+            result = response.json()
+            print(f"   Response JSON keys: {list(result.keys())}")
+            
+            # Check for JSON-RPC error
+            if "error" in result:
+                error_details = result['error']
+                print(f"   JSON-RPC error: {error_details}")
+                raise Exception(f"Agent returned JSON-RPC error: {error_details}")
+            
+            # Get the response from message/send
+            if "result" not in result:
+                raise Exception("No result in agent response")
+            
+            message_result = result["result"]
+            
+            # For message/send, the response might be a Task or Message
+            if isinstance(message_result, dict):
+                # If it's a Task, we need to poll for completion
+                if "id" in message_result and "status" in message_result:
+                    task_id = message_result["id"]
+                    
+                    # Poll for task completion - RAG agent may need more time for processing
+                    max_attempts = 120  # Poll for up to 120 seconds (2 minutes)
+                    poll_interval = 1  # Check every second
+                    
+                    print(f"   Polling for task completion (task_id: {task_id})...")
+                    for attempt in range(max_attempts):
+                        if attempt > 0:  # Don't sleep on first attempt
+                            await asyncio.sleep(poll_interval)
                         
-                        # Poll for task completion - RAG agent may need more time for processing
-                        max_attempts = 120  # Poll for up to 120 seconds (2 minutes)
-                        poll_interval = 1  # Check every second
+                        if attempt % 10 == 0:  # Log every 10 seconds
+                            print(f"   Polling attempt {attempt + 1}/{max_attempts}...")
                         
-                        print(f"   Polling for task completion (task_id: {task_id})...")
-                        for attempt in range(max_attempts):
-                            if attempt > 0:  # Don't sleep on first attempt
-                                await asyncio.sleep(poll_interval)
-                            
-                            if attempt % 10 == 0:  # Log every 10 seconds
-                                print(f"   Polling attempt {attempt + 1}/{max_attempts}...")
-                            
-                            get_payload = {
-                                "jsonrpc": "2.0",
-                                "id": str(uuid4()),
-                                "method": "tasks/get",
-                                "params": {
-                                    "id": task_id
-                                }
+                        get_payload = {
+                            "jsonrpc": "2.0",
+                            "id": str(uuid4()),
+                            "method": "tasks/get",
+                            "params": {
+                                "id": task_id
                             }
+                        }
+                        
+                        try:
+                            get_response = await client.post(
+                                endpoint_clean,
+                                json=get_payload,
+                                headers={"Content-Type": "application/json"},
+                                timeout=5.0  # Individual request timeout
+                            )
+                            get_response.raise_for_status()
                             
-                            try:
-                                get_response = await client.post(
-                                    endpoint_clean,
-                                    json=get_payload,
-                                    headers={"Content-Type": "application/json"},
-                                    timeout=5.0  # Individual request timeout
-                                )
-                                get_response.raise_for_status()
+                            get_result = get_response.json()
+                            
+                            if "result" in get_result and get_result["result"]:
+                                task_data = get_result["result"]
                                 
-                                get_result = get_response.json()
+                                # Check task state
+                                task_state = task_data.get("status", {}).get("state")
+                                print(f"   Task state: {task_state} (attempt {attempt + 1})")
                                 
-                                if "result" in get_result and get_result["result"]:
-                                    task_data = get_result["result"]
-                                    
-                                    # Check task state
-                                    task_state = task_data.get("status", {}).get("state")
-                                    print(f"   Task state: {task_state} (attempt {attempt + 1})")
-                                    
-                                    if task_state == "completed":
-                                        # Extract response from artifacts
-                                        artifacts = task_data.get("artifacts", [])
-                                        if artifacts:
-                                            for artifact in artifacts:
-                                                parts = artifact.get("parts", [])
-                                                for part in parts:
-                                                    if part.get("kind") == "text":
-                                                        return part.get("text", "No text in response")
-                                        
-                                        return "Task completed but no response text found"
-                                    elif task_state == "failed":
-                                        error_msg = task_data.get("status", {}).get("message", {})
-                                        if error_msg and isinstance(error_msg, dict):
-                                            parts = error_msg.get("parts", [])
-                                            for part in parts:
-                                                if part.get("kind") == "text":
-                                                    return f"Agent task failed: {part.get('text', 'Unknown error')}"
-                                        return "Agent task failed"
-                                    elif task_state == "input-required":
-                                        # Extract response from status message for input-required state
-                                        status_message = task_data.get("status", {}).get("message", {})
-                                        if status_message:
-                                            parts = status_message.get("parts", [])
+                                if task_state == "completed":
+                                    # Extract response from artifacts
+                                    artifacts = task_data.get("artifacts", [])
+                                    if artifacts:
+                                        for artifact in artifacts:
+                                            parts = artifact.get("parts", [])
                                             for part in parts:
                                                 if part.get("kind") == "text":
-                                                    return part.get("text", "No text in input-required response")
-                                        return "Agent requires input but no message provided"
-                                    
-                                    # If still working or pending, continue polling
-                                    if task_state in ["working", "pending"]:
-                                        continue
+                                                    return part.get("text", "No text in response")
                                     
-                                    # Unknown state, log and continue polling
-                                    print(f"   Unknown task state: {task_state}, continuing to poll...")
-                                    continue
-                                    
-                            except Exception as poll_err:
-                                print(f"   Polling error (attempt {attempt + 1}): {poll_err}")
-                                # Continue polling on individual request errors
-                                if attempt < max_attempts - 1:
+                                    return "Task completed but no response text found"
+                                elif task_state == "failed":
+                                    error_msg = task_data.get("status", {}).get("message", {})
+                                    if error_msg and isinstance(error_msg, dict):
+                                        parts = error_msg.get("parts", [])
+                                        for part in parts:
+                                            if part.get("kind") == "text":
+                                                return f"Agent task failed: {part.get('text', 'Unknown error')}"
+                                    return "Agent task failed"
+                                elif task_state == "input-required":
+                                    # Extract response from status message for input-required state
+                                    status_message = task_data.get("status", {}).get("message", {})
+                                    if status_message:
+                                        parts = status_message.get("parts", [])
+                                        for part in parts:
+                                            if part.get("kind") == "text":
+                                                return part.get("text", "No text in input-required response")
+                                    return "Agent requires input but no message provided"
+                                
+                                # If still working or pending, continue polling
+                                if task_state in ["working", "pending"]:
                                     continue
-                                else:
-                                    raise
-                        
-                        print(f"   WARNING: Task did not complete within {max_attempts * poll_interval} seconds")
-                        return f"Task did not complete within {max_attempts * poll_interval} seconds timeout"
+                                
+                                # Unknown state, log and continue polling
+                                print(f"   Unknown task state: {task_state}, continuing to poll...")
+                                continue
+                                
+                        except Exception as poll_err:
+                            print(f"   Polling error (attempt {attempt + 1}): {poll_err}")
+                            # Continue polling on individual request errors
+                            if attempt < max_attempts - 1:
+                                continue
+                            else:
+                                raise
                     
-                    # If it's a direct Message response
-                    elif "parts" in message_result:
-                        for part in message_result.get("parts", []):
-                            if part.get("type") == "text":
-                                return part.get("text", "No text in message")
-                        return "Message received but no text content"
-                
-                return "Unexpected response format from agent"
+                    print(f"   WARNING: Task did not complete within {max_attempts * poll_interval} seconds")
+                    return f"Task did not complete within {max_attempts * poll_interval} seconds timeout"
                 
+                # If it's a direct Message response
+                elif "parts" in message_result:
+                    for part in message_result.get("parts", []):
+                        if part.get("type") == "text":
+                            return part.get("text", "No text in message")
+                    return "Message received but no text content"
+            
+            return "Unexpected response format from agent"
+            
         except httpx.ConnectError as e:
             error_msg = f"Could not connect to agent at {endpoint}. Make sure the agent is running. Error: {str(e)}"
             print(f"   CONNECTION ERROR: {error_msg}")
@@ -943,13 +1143,87 @@ class SmartOrchestrator:
             print(f"   TRACEBACK: {traceback.format_exc()}")
             raise Exception(error_msg)
 
-    async def process_request(self, request: str, session_id: Optional[str] = None) -> Dict:
+    async def _stream_request_to_agent(
+        self,
+        client: httpx.AsyncClient,
+        endpoint: str,
+        payload: Dict,
+        on_progress: Callable[[str], Awaitable[None]]
+    ) -> str:
+        """Send a message/stream request and relay status updates until the task ends"""
+        artifacts: Dict[str, str] = {}
+        
+        def text_of(parts: List[Dict]) -> str:
+            return "".join(part.get("text", "") for part in parts if part.get("kind") == "text")
+        
+        print(f"   POST message/stream to {endpoint}...")
+        async with client.stream(
+            "POST",
+            endpoint,
+            json=payload,
+            headers={"Accept": "text/event-stream"},
+            # Events can be far apart while the agent works on a long reply
+            timeout=httpx.Timeout(60.0, read=120.0)
+        ) as response:
+            response.raise_for_status()
+            
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                
+                result = json.loads(line[len("data:"):])
+                if "error" in result:
+                    raise Exception(f"Agent returned JSON-RPC error: {result['error']}")
+                
+                event = result.get("result") or {}
+                kind = event.get("kind")
+                
+                if kind == "message":
+                    return text_of(event.get("parts", [])) or "Message received but no text content"
+                
+                if kind == "artifact-update":
+                    artifact = event.get("artifact", {})
+                    artifact_id = artifact.get("artifactId", "")
+                    text = text_of(artifact.get("parts", []))
+                    if event.get("append"):
+                        artifacts[artifact_id] = artifacts.get(artifact_id, "") + text
+                    else:
+                        artifacts[artifact_id] = text
+                    continue
+                
+                status = event.get("status", {})
+                task_state = status.get("state")
+                status_text = text_of((status.get("message") or {}).get("parts", []))
+                
+                if task_state == "completed":
+                    if artifacts:
+                        return next(iter(artifacts.values()))
+                    return status_text or "Task completed but no response text found"
+                elif task_state == "failed":
+                    return f"Agent task failed: {status_text}" if status_text else "Agent task failed"
+                elif task_state == "input-required":
+                    return status_text or "Agent requires input but no message provided"
+                
+                if status_text:
+                    await on_progress(status_text)
+        
+        if artifacts:
+            return next(iter(artifacts.values()))
+        return "Agent stream ended without a response"
+    
+    async def process_request(
+        self,
+        request: str,
+        session_id: Optional[str] = None,
+        on_progress: Optional[Callable[[str], Awaitable[None]]] = None
+    ) -> Dict:
         """Process a request through the LangGraph workflow with context management"""
         # Log incoming session_id for debugging
         print(f"process_request called with session_id: {session_id} (type: {type(session_id)})")
         
         # Get or create session
         session_id = self.context_manager.get_or_create_session(session_id)
+        await self.context_manager.load_session(session_id)
         print(f"Validated session_id: {session_id}")
         
         # Store original request
@@ -978,7 +1252,10 @@ class SmartOrchestrator:
         )
         
         try:
-            final_state = await self.workflow.ainvoke(initial_state)
+            final_state = await self.workflow.ainvoke(
+                initial_state,
+                config={"configurable": {"on_progress": on_progress}}
+            )
             
             # Handle case where no agent was selected
             if not final_state["selected_agent"]:
@@ -990,6 +1267,8 @@ class SmartOrchestrator:
                     "session_id": final_state["session_id"],
                     "selected_agent_id": "",
                     "selected_agent_name": "None",
+                    # Names only, so callers need not rebuild the full agent list
+                    "available_agent_names": [agent_card.name for agent_card in self.agents.values()],
                     "agent_skills": [],
                     "confidence": 0.0,
                     "reasoning": final_state["reasoning"],
@@ -1029,6 +1308,7 @@ class SmartOrchestrator:
                         "context_enriched": final_state["metadata"].get("context_enriched", False)
                     }
                 )
+                await self.context_manager.save_session(final_state["session_id"])
             
             return {
                 "success": True,
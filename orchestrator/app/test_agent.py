@@ -4,7 +4,10 @@ Simple pytest tests for SmartOrchestrator
 import pytest
 from unittest.mock import Mock, patch, AsyncMock
 import os
+from collections import Counter
+from types import SimpleNamespace
 from app.orchestrator import SmartOrchestrator, RouterState
+from app.context_manager import OrchestratorContextManager
 
 
 class TestSmartOrchestrator:
@@ -100,3 +103,199 @@ class TestSmartOrchestrator:
         assert 'success' in result
         assert result['success'] is False
 
+
+def _make_skill(name, description, tags):
+    return SimpleNamespace(id=name.lower(), name=name, description=description, tags=tags, examples=None)
+
+
+def _make_agent_card(name, url, skills):
+    return SimpleNamespace(
+        name=name,
+        description=f"{name} agent",
+        url=url,
+        capabilities=SimpleNamespace(streaming=True),
+        skills=skills
+    )
+
+
+def _make_router_state(request):
+    return RouterState(
+        request=request,
+        original_request=request,
+        session_id="test-session",
+        selected_agent="",
+        confidence=0.0,
+        reasoning="",
+        response="",
+        error="",
+        metadata={}
+    )
+
+
+ROUTING_REQUESTS = [
+    "convert 100 usd to eur",
+    "what is the exchange rate for usd",
+    "solve the equation x + 2 = 5",
+    "calculate the mean of this data",
+    "what time is it in london",
+    "how many days between these dates",
+    "search documents to find the report",
+    "Hello",
+]
+
+
+class TestSmartOrchestratorRouting:
+    """Test suite for SmartOrchestrator request routing"""
+    
+    @patch('app.orchestrator.SmartOrchestrator._initialize_default_agents')
+    def _build_orchestrator(self, mock_init):
+        mock_init.return_value = None
+        orchestrator = SmartOrchestrator()
+        orchestrator.add_agent("Math Agent", _make_agent_card("Math Agent", "http://localhost:8002", [
+            _make_skill("Calculator", "Performs arithmetic calculations and algebra", ["math", "calculate", "equation", "solve"]),
+            _make_skill("Statistics", "Statistical analysis of data sets", ["mean", "median", "data"]),
+        ]))
+        orchestrator.add_agent("Currency Agent", _make_agent_card("Currency Agent", "http://localhost:8003", [
+            _make_skill("Currency Exchange", "Converts currency using exchange rates", ["currency", "exchange", "usd", "eur"]),
+        ]))
+        orchestrator.add_agent("Time Agent", _make_agent_card("Time Agent", "http://localhost:8001", [
+            _make_skill("Time Lookup", "Current time and date in timezones", ["time", "date", "timezone"]),
+            _make_skill("Date Calculator", "Date calculations", ["days", "between"]),
+        ]))
+        orchestrator.add_agent("RAG Agent", _make_agent_card("RAG Agent", "http://localhost:8004", [
+            _make_skill("Document Search", "Searches documents and answers questions", ["search", "document", "find"]),
+        ]))
+        return orchestrator
+    
+    @pytest.mark.asyncio
+    async def test_pruned_routing_matches_unpruned(self):
+        """Test that pruning agents during scoring does not change the routing decision"""
+        orchestrator = self._build_orchestrator()
+        
+        pruned_results = []
+        pruned_count = 0
+        for request in ROUTING_REQUESTS:
+            state = await orchestrator._analyze_request(_make_router_state(request))
+            metadata = state["metadata"]
+            # Every agent is listed with the usual types; pruned agents are
+            # named separately and carry a 0.0 score with no matches
+            for key in ("agent_scores", "skill_matches", "semantic_matches"):
+                assert set(metadata[key]) == set(orchestrator.agents)
+            assert all(isinstance(score, float) for score in metadata["agent_scores"].values())
+            assert all(isinstance(matches, list) for matches in metadata["skill_matches"].values())
+            assert all(isinstance(matches, list) for matches in metadata["semantic_matches"].values())
+            for agent_id in metadata["pruned_agents"]:
+                assert metadata["agent_scores"][agent_id] == 0.0
+                assert agent_id != state["selected_agent"]
+            pruned_count += len(metadata["pruned_agents"])
+            pruned_results.append((state["selected_agent"], state["confidence"], state["reasoning"], metadata))
+        assert pruned_count > 0
+        
+        # Without score bounds every agent is scored in full
+        orchestrator.agent_score_bounds.clear()
+        orchestrator._routing_cache.clear()
+        for request, (agent, confidence, reasoning, pruned_metadata) in zip(ROUTING_REQUESTS, pruned_results):
+            state = await orchestrator._analyze_request(_make_router_state(request))
+            assert state["metadata"]["pruned_agents"] == []
+            assert (state["selected_agent"], state["confidence"], state["reasoning"]) == (agent, confidence, reasoning)
+            for agent_id, score in pruned_metadata["agent_scores"].items():
+                if agent_id not in pruned_metadata["pruned_agents"]:
+                    assert state["metadata"]["agent_scores"][agent_id] == score
+    
+    @pytest.mark.asyncio
+    async def test_routing_cache_hit(self):
+        """Test that a repeated request reuses the cached routing decision"""
+        orchestrator = self._build_orchestrator()
+        
+        with patch.object(orchestrator, '_score_request', wraps=orchestrator._score_request) as mock_score:
+            first = await orchestrator._analyze_request(_make_router_state("Convert 100 USD to EUR"))
+            second = await orchestrator._analyze_request(_make_router_state("convert 100 usd to eur"))
+        
+        assert mock_score.call_count == 1
+        assert len(orchestrator._routing_cache) == 1
+        assert first["selected_agent"] == second["selected_agent"] == "Currency Agent"
+        assert first["confidence"] == second["confidence"]
+        assert first["metadata"]["agent_scores"] == second["metadata"]["agent_scores"]
+        assert first["metadata"]["request_id"] != second["metadata"]["request_id"]
+        
+        # The metadata holds copies, so callers cannot alter the cached decision
+        first["metadata"]["agent_scores"].clear()
+        third = await orchestrator._analyze_request(_make_router_state("convert 100 usd to eur"))
+        assert third["metadata"]["agent_scores"] == second["metadata"]["agent_scores"]
+    
+    @pytest.mark.asyncio
+    async def test_routing_cache_invalidated_on_registry_change(self):
+        """Test that adding or removing an agent drops the cached routing decisions"""
+        orchestrator = self._build_orchestrator()
+        request = "solve the equation x + 2 = 5"
+        
+        state = await orchestrator._analyze_request(_make_router_state(request))
+        assert state["selected_agent"] == "Math Agent"
+        assert len(orchestrator._routing_cache) == 1
+        version = orchestrator.registry_version
+        
+        orchestrator.add_agent("Algebra Agent", _make_agent_card("Algebra Agent", "http://localhost:8005", [
+            _make_skill("Equation Solver", "Solves algebra equation problems", ["solve", "equation", "algebra", "x"]),
+        ]))
+        assert orchestrator.registry_version == version + 1
+        assert len(orchestrator._routing_cache) == 0
+        
+        state = await orchestrator._analyze_request(_make_router_state(request))
+        assert state["selected_agent"] == "Algebra Agent"
+        assert set(state["metadata"]["agent_scores"]) == set(orchestrator.agents)
+        
+        result = await orchestrator.unregister_agent("Algebra Agent")
+        assert result["success"] is True
+        assert orchestrator.registry_version == version + 2
+        assert len(orchestrator._routing_cache) == 0
+        
+        state = await orchestrator._analyze_request(_make_router_state(request))
+        assert state["selected_agent"] == "Math Agent"
+        assert "Algebra Agent" not in state["metadata"]["agent_scores"]
+
+class TestOrchestratorContextManager:
+    """Test suite for OrchestratorContextManager"""
+    
+    def test_enrich_resolves_typographic_apostrophe(self):
+        """Test that a reference written with a curly apostrophe is still resolved"""
+        manager = OrchestratorContextManager()
+        session_id = manager.get_or_create_session()
+        manager.add_conversation_turn(session_id, "exchange 100 usd to eur", "Currency Agent", "100 USD is 92 EUR", 0.9)
+        
+        for query in ("what’s it’s value in gbp", "what's it's value in gbp"):
+            enriched = manager.enrich_query_with_context(session_id, query)
+            assert "currency exchange analysis" in enriched
+    
+    def test_turn_overflow_keeps_usage_consistent(self):
+        """Test that turns and topics dropped by the session deques leave the usage counters"""
+        manager = OrchestratorContextManager(session_timeout_hours=0)
+        session_id = manager.get_or_create_session()
+        queries = [
+            "weather in boston",
+            "exchange rate for the dollar",
+            "chart of new york temperature",
+            "price in chicago",
+            "report on california",
+            "snow in los angeles",
+            "san francisco market analysis",
+        ]
+        
+        for i in range(60):
+            manager.add_conversation_turn(session_id, queries[i % len(queries)], f"Agent {i % 7}", "done", 0.9)
+        
+        session = manager.sessions[session_id]
+        assert len(session.turns) == session.turns.maxlen
+        assert len(session.active_topics) == session.active_topics.maxlen
+        assert manager._turn_count == len(session.turns)
+        assert manager._agent_usage == Counter(turn.agent_name for turn in session.turns)
+        assert manager._topic_usage == Counter(session.active_topics)
+        
+        stats = manager.get_session_stats()
+        assert stats["total_turns"] == len(session.turns)
+        assert set(stats["active_topics"]) == set(session.active_topics)
+        
+        # Expiring the session takes its usage with it
+        assert manager.cleanup_expired_sessions() == 1
+        assert manager._turn_count == 0
+        assert not manager._agent_usage
+        assert not manager._topic_usage